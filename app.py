@@ -14,16 +14,18 @@ import uuid
 import os
 import sqlite3
 import threading
+import time
 from datetime import datetime, timedelta
 from fastapi import File, UploadFile
 from fastapi.staticfiles import StaticFiles
 import shutil
 from pathlib import Path
+from cachetools import TTLCache
 
 from utils import (
     ExamSystem, ExamSession, AdminSession,
     create_admin_session, verify_admin_session,
-    convert_utc_to_bangladesh, order_questions_by_type,
+    convert_utc_to_bangladesh_batch, order_questions_by_type,
     group_questions_by_section_for_navigation, validate_form_data,
     generate_safe_filename
 )
@@ -76,7 +78,7 @@ security = HTTPBasic()
 app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
 
 # Initialize exam system with primary and backup API keys
-exam_system = ExamSystem(API_KEY, API_KEY_BACKUP)
+exam_system = ExamSystem(API_KEY, API_KEY_BACKUP, db=db)
 
 # Initialize evaluation queue for background processing
 # Rate limit: 10 requests per minute to prevent API quota exhaustion
@@ -91,7 +93,8 @@ evaluation_queue = init_evaluation_queue(
 _exam_sessions_lock = threading.Lock()
 _admin_sessions_lock = threading.Lock()
 exam_sessions = {}  # Cache for quick access, but database is source of truth
-admin_sessions = {}
+# Admin sessions expire out of the cache on their own, so abandoned logins don't accumulate
+admin_sessions = TTLCache(maxsize=10000, ttl=ADMIN_SESSION_TIMEOUT * 60)
 
 
 def get_exam_session(session_id: str) -> Optional[ExamSession]:
@@ -679,7 +682,8 @@ async def admin_login(request: Request, secret_key: str = Form(...)):
         set_admin_session(session_id, AdminSession(
             session_id=session_id,
             created_at=datetime.now(),
-            expires_at=datetime.now() + timedelta(minutes=ADMIN_SESSION_TIMEOUT)
+            expires_at=datetime.now() + timedelta(minutes=ADMIN_SESSION_TIMEOUT),
+            expires_at_monotonic=time.monotonic() + ADMIN_SESSION_TIMEOUT * 60
         ))
 
         response = RedirectResponse(url="/admin", status_code=303)
@@ -871,7 +875,7 @@ async def create_exam(request: Request, session_id: str = Depends(verify_admin_a
         # Process AI-generated sections
         if ai_sections:
             print(f"🤖 Generating questions using AI for {len(ai_sections)} sections in {exam_language}")
-            generation_result = exam_system.generate_exam_questions_by_sections(
+            generation_result = await exam_system.agenerate_exam_questions_by_sections(
                 department, position, ai_sections, exam_language,
                 difficulty_level=difficulty_level,
                 custom_instructions=ai_custom_instructions,
@@ -1035,11 +1039,11 @@ async def view_exam_page(request: Request, exam_id: str, session_id: str = Depen
         live_candidates = db.get_live_candidates(exam_id)
         
         # Convert times to Bangladesh timezone
-        for candidate in live_candidates:
-            if candidate.get('started_at'):
-                candidate['started_at'] = convert_utc_to_bangladesh(candidate['started_at'])
-            if candidate.get('last_activity'):
-                candidate['last_activity'] = convert_utc_to_bangladesh(candidate['last_activity'])
+        for field in ('started_at', 'last_activity'):
+            bd_times = convert_utc_to_bangladesh_batch([candidate.get(field) for candidate in live_candidates])
+            for candidate, bd_time in zip(live_candidates, bd_times):
+                if candidate.get(field):
+                    candidate[field] = bd_time
         
         live_count = len(live_candidates)
         
@@ -1208,7 +1212,7 @@ async def regenerate_section(exam_id: str, section_type: str, request: Request,
         print(f"📋 Custom instructions: {custom_instructions[:100] if custom_instructions else 'None'}...")
 
         # Generate questions for this single section
-        result = exam_system.regenerate_section_questions(
+        result = await exam_system.aregenerate_section_questions(
             department=exam['department'],
             position=exam['position'],
             section_type=section_type,
@@ -1305,11 +1309,11 @@ async def get_live_candidates(exam_id: str, session_id: str = Depends(verify_adm
         live_candidates = db.get_live_candidates(exam_id)
         
         # Convert times to Bangladesh timezone
-        for candidate in live_candidates:
-            if candidate.get('started_at'):
-                candidate['started_at'] = convert_utc_to_bangladesh(candidate['started_at'])
-            if candidate.get('last_activity'):
-                candidate['last_activity'] = convert_utc_to_bangladesh(candidate['last_activity'])
+        for field in ('started_at', 'last_activity'):
+            bd_times = convert_utc_to_bangladesh_batch([candidate.get(field) for candidate in live_candidates])
+            for candidate, bd_time in zip(live_candidates, bd_times):
+                if candidate.get(field):
+                    candidate[field] = bd_time
         
         return {
             "success": True,
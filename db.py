@@ -12,6 +12,11 @@ from typing import Dict, List, Optional
 import os
 
 
+# Bounds for the evaluation_cache table: newest rows kept, and how long a cached evaluation is reused
+EVALUATION_CACHE_MAX_ROWS = 20000
+EVALUATION_CACHE_RETENTION_DAYS = 90
+
+
 class ExamDatabase:
     def __init__(self, db_path: str = "exam_system.db"):
         """Initialize the database connection and create tables if they don't exist"""
@@ -214,6 +219,19 @@ class ExamDatabase:
                 )
             ''')
 
+            # Create evaluation_cache table so repeated answers reuse earlier AI evaluations
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS evaluation_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    question_id TEXT,
+                    evaluation_data TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            self._add_column_if_not_exists(cursor, 'evaluation_cache', 'question_id', 'TEXT')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_evaluation_cache_question ON evaluation_cache (question_id)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_evaluation_cache_created ON evaluation_cache (created_at)')
+
             conn.commit()
             print("✅ Exam database initialized successfully with image support and persistent sessions")
 
@@ -1117,6 +1135,9 @@ class ExamDatabase:
                     correct_answers_json,
                     question_id
                 ))
+
+                # Cached AI evaluations were graded against the old question content
+                cursor.execute('DELETE FROM evaluation_cache WHERE question_id = ?', (str(question_id),))
                 conn.commit()
                 return True
         except sqlite3.Error as e:
@@ -1132,8 +1153,9 @@ class ExamDatabase:
                 # Delete question images first
                 cursor.execute('DELETE FROM question_images WHERE question_id = ?', (question_id,))
                 
-                # Delete the question
+                # Delete the question and its cached AI evaluations
                 cursor.execute('DELETE FROM questions WHERE id = ?', (question_id,))
+                cursor.execute('DELETE FROM evaluation_cache WHERE question_id = ?', (str(question_id),))
                 
                 conn.commit()
                 return True
@@ -2345,6 +2367,46 @@ class ExamDatabase:
             print(f"❌ Error marking result for retry: {e}")
             return False
 
+    # Evaluation Cache
+
+    def get_cached_evaluation(self, cache_key: str) -> Optional[Dict]:
+        """Get a cached AI evaluation by its cache key"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT evaluation_data FROM evaluation_cache WHERE cache_key = ?
+                ''', (cache_key,))
+                row = cursor.fetchone()
+                return json.loads(row[0]) if row else None
+        except sqlite3.Error as e:
+            print(f"❌ Error reading evaluation cache: {e}")
+            return None
+
+    def save_cached_evaluation(self, cache_key: str, question_id: str, evaluation: Dict) -> bool:
+        """Store an AI evaluation in the evaluation cache, pruning expired and excess rows"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    INSERT OR REPLACE INTO evaluation_cache (cache_key, question_id, evaluation_data)
+                    VALUES (?, ?, ?)
+                ''', (cache_key, str(question_id), json.dumps(evaluation)))
+                cursor.execute(
+                    "DELETE FROM evaluation_cache WHERE created_at < datetime('now', ?)",
+                    (f'-{EVALUATION_CACHE_RETENTION_DAYS} days',)
+                )
+                # Rowids grow with every insert, so this keeps (at most) the newest rows
+                cursor.execute('''
+                    DELETE FROM evaluation_cache
+                    WHERE rowid <= (SELECT MAX(rowid) FROM evaluation_cache) - ?
+                ''', (EVALUATION_CACHE_MAX_ROWS,))
+                conn.commit()
+                return True
+        except sqlite3.Error as e:
+            print(f"❌ Error saving evaluation cache: {e}")
+            return False
+
 
 # Initialize database instance
 db = ExamDatabase()
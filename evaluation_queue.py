@@ -16,7 +16,7 @@ from queue import PriorityQueue
 import traceback
 
 # Import shared MCQ evaluation function
-from utils import evaluate_mcq_answer, get_performance_level
+from utils import evaluate_mcq_answer, get_performance_level, resolve_negative_marking_config, SectionNegConfig
 
 
 class EvaluationStatus(str, Enum):
@@ -480,6 +480,7 @@ class EvaluationQueue:
         obtained_marks = 0
         negative_marks = 0
         question_results = []
+        section_neg_configs = resolve_negative_marking_config(task.negative_marking_config)
 
         for question in task.questions:
             question_id = str(question['id'])
@@ -490,7 +491,8 @@ class EvaluationQueue:
                 # Auto-evaluate MCQ
                 result = self._evaluate_mcq(question, candidate_answer,
                                            task.negative_marking_config, section_type,
-                                           task.multi_select_scoring_mode)
+                                           task.multi_select_scoring_mode,
+                                           neg_cfg=section_neg_configs.get(section_type))
                 negative_marks += result.get('negative_marks_applied', 0)
             else:
                 # For non-MCQ, mark as pending manual review
@@ -525,12 +527,13 @@ class EvaluationQueue:
 
     def _evaluate_mcq(self, question: Dict, candidate_answer: str,
                       negative_marking_config: Dict, section_type: str,
-                      multi_select_scoring_mode: str = 'partial') -> Dict:
+                      multi_select_scoring_mode: str = 'partial',
+                      neg_cfg: Optional[SectionNegConfig] = None) -> Dict:
         """Evaluate a single MCQ question.
 
         Delegates to the shared evaluate_mcq_answer function for consistency.
         """
-        return evaluate_mcq_answer(question, candidate_answer, negative_marking_config, section_type, multi_select_scoring_mode)
+        return evaluate_mcq_answer(question, candidate_answer, negative_marking_config, section_type, multi_select_scoring_mode, neg_cfg=neg_cfg)
 
     def _get_performance_level(self, percentage: float) -> str:
         """Get performance level based on percentage.
@@ -4,72 +4,901 @@ Replaces GeminiAnalyzer with Groq API (using Llama 3 models)
 """
 
 import os
-import json
 import re
-from typing import Dict, List, Optional
+import string
+import asyncio
+import concurrent.futures
+import difflib
+import hashlib
+import math
+import random
+import threading
+from collections import deque
+from enum import IntEnum
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional
 import time
-from groq import Groq, GroqError
+import fastjsonschema
+import httpx
+import jinja2
+import orjson
+from groq import (
+    APIConnectionError, APIStatusError, APITimeoutError, Groq, GroqError, InternalServerError, RateLimitError
+)
+
+# Maximum number of sections generated concurrently (keeps bursts under Groq's TPM limits)
+GROQ_CONCURRENCY = int(os.getenv("GROQ_CONCURRENCY", "4"))
+
+# Tokens-per-minute budget for the Groq key, enforced client-side; 0 or unset disables it.
+# Set it to your account's limit - 7000 matches Llama 3 70B on the free tier, higher tiers allow far more
+GROQ_TPM = int(os.getenv("GROQ_TPM") or 0)
+
+# Requests-per-minute limit for the Groq key; 0 or unset disables it (the free tier allows 30)
+GROQ_RPM = int(os.getenv("GROQ_RPM") or 0)
+
+# Groq rejects any single request larger than the per-minute token limit outright; without a
+# configured limit, requests are kept within the model's 32k maximum completion size instead
+MAX_REQUEST_TOKENS = GROQ_TPM or 32768
+
+# Expected completion size of one generated question, by question type
+MCQ_COMPLETION_TOKENS = 80
+SHORT_COMPLETION_TOKENS = 150
+ESSAY_COMPLETION_TOKENS = 400
+
+# Rough completion size reserved for a single subjective answer evaluation
+EVALUATION_COMPLETION_TOKENS = 300
+
+# Estimated token budget for one batched evaluation request (keeps it under the free tier's 7000 TPM)
+EVALUATION_BATCH_TOKEN_BUDGET = 5000
+
+# Print detailed diagnostics when generated questions fail validation (otherwise only a reason code is logged)
+VALIDATION_DEBUG = os.getenv("GROQ_VALIDATION_DEBUG", "false").lower() == "true"
+
+# Near-duplicate answer reuse: an evaluation is reused when the SimHash (64 bits) of a new
+# answer is within SIMHASH_MAX_DISTANCE bits of an evaluated one for the same question;
+# it is trusted without manual review only within SIMHASH_TRUSTED_DISTANCE (~95% similar)
+SIMHASH_MAX_DISTANCE = 4
+SIMHASH_TRUSTED_DISTANCE = 3
+# Shorter answers are only reused on an exact match - one word can flip their meaning
+SIMHASH_MIN_WORDS = 8
+SIMHASH_ENTRIES_PER_QUESTION = 256
+
+# Evaluations kept for exact (whitespace-normalized) repeats of an answer, across all questions
+EXACT_EVALUATION_CACHE_SIZE = 4096
+
+# Upper bound for a single retry delay in seconds
+MAX_BACKOFF_SECONDS = 60.0
+
+# Transient API failures worth retrying with backoff (SDK retries are disabled on our clients)
+_TRANSIENT_ERRORS = (APIConnectionError, APITimeoutError, InternalServerError)
+
+# Answers with no letters or digits at all (e.g. "...", "???", "-")
+_NOISE_ANSWER_RE = re.compile(r'[\W_]+')
+
+# Non-answers that can be scored 0 without asking the model (compared lowercased, without trailing punctuation).
+# Only phrases that can never be a correct answer - tokens like "na" (sodium), "none" or "pass" can be.
+_BOILERPLATE_ANSWERS = frozenset({
+    "i don't know", "i dont know", "don't know", "dont know", "idk", "no idea", "not sure",
+    "skip", "no answer"
+})
+
+# Matches Groq's rate limit message, e.g. "Please try again in 50.6s" or "try again in 1m2.5s"
+_TRY_AGAIN_RE = re.compile(r'try again in (?:(\d+)m)?(\d+(?:\.\d+)?)s')
+
+# Invariant prompt blocks, built once at import instead of on every section prompt
+_LANGUAGE_INSTRUCTION_BN_SECTION = """
+            📤 CRITICAL LANGUAGE REQUIREMENT: ALL questions, options, and explanations MUST be written in BENGALI language.
+            Use proper Bengali script (বাংলা) for all content in this section.
+            """
+
+_LANGUAGE_INSTRUCTION_EN_SECTION = """
+            📤 CRITICAL LANGUAGE REQUIREMENT: ALL questions, options, and explanations MUST be written in ENGLISH language.
+            This section tests English language proficiency, so use proper English for all content.
+            """
+
+_LANGUAGE_INSTRUCTION_BN = """
+                📤 CRITICAL LANGUAGE REQUIREMENT: ALL questions, options, and explanations MUST be written in BENGALI language.
+                Use proper Bengali script (বাংলা) for all content. This is a Bengali language exam.
+                """
+
+_LANGUAGE_INSTRUCTION_EN = """
+                📤 CRITICAL LANGUAGE REQUIREMENT: ALL questions, options, and explanations MUST be written in ENGLISH language.
+                Use proper English for all content. This is an English language exam.
+                """
+
+_OPTION_LETTERS = ('A', 'B', 'C', 'D', 'E', 'F')
+
+# Question types mapped to small ints once per question, so the validator's dispatch is an int compare
+_TYPE_MCQ, _TYPE_SHORT, _TYPE_ESSAY = 0, 1, 2
+_TYPE_MAP = {'mcq': _TYPE_MCQ, 'short': _TYPE_SHORT, 'essay': _TYPE_ESSAY}
+
+# Keys every generated question must have, whatever its type
+_REQUIRED_QUESTION_KEYS = frozenset({'type', 'question', 'marks'})
+
+# Structure of a generated section's questions. Answer indices are only bounded by the largest
+# options count here; the per-question bound (len(options)) is checked in the validator
+_QUESTIONS_SCHEMA = {
+    "$schema": "http://json-schema.org/draft-07/schema#",
+    "type": "array",
+    "items": {
+        "type": "object",
+        "required": sorted(_REQUIRED_QUESTION_KEYS),
+        "properties": {
+            "type": {"enum": ["mcq", "short", "essay"]},
+            "is_multi_select": {"type": "boolean"}
+        },
+        "allOf": [
+            {
+                "if": {"properties": {"type": {"const": "mcq"}}},
+                "then": {
+                    "required": ["options"],
+                    "properties": {"options": {"type": "array", "minItems": 2, "maxItems": 6}},
+                    "if": {"required": ["is_multi_select"], "properties": {"is_multi_select": {"const": True}}},
+                    "then": {
+                        "required": ["correct_answers"],
+                        "properties": {"correct_answers": {
+                            "type": "array", "minItems": 2, "uniqueItems": True,
+                            "items": {"type": "integer", "minimum": 0, "maximum": 5}
+                        }}
+                    },
+                    "else": {
+                        "required": ["correct_answer"],
+                        "properties": {"correct_answer": {"type": "integer", "minimum": 0, "maximum": 5}}
+                    }
+                }
+            },
+            {
+                "if": {"properties": {"type": {"enum": ["short", "essay"]}}},
+                "then": {"required": ["expected_answer"]}
+            }
+        ]
+    }
+}
+
+# Compiled once at import into specialized Python code
+_validate_questions_schema = fastjsonschema.compile(_QUESTIONS_SCHEMA)
+
+
+class VReason(IntEnum):
+    """Why a generated section failed _check_questions_structure (OK when it passed)"""
+    OK = 0
+    NOT_LIST = 1
+    COUNT_MISMATCH = 2
+    INVALID_STRUCTURE = 3
+    ANSWER_OUT_OF_RANGE = 4
+    TYPE_COUNT_MISMATCH = 5
+    ERROR = 6
+
+_DIFFICULTY_INSTRUCTIONS = {
+    'easy': """
+            🟢 DIFFICULTY LEVEL: EASY
+            - Questions should test basic knowledge and fundamental concepts
+            - Use straightforward language and clear scenarios
+            - MCQ options should be clearly distinguishable
+            - Focus on recall and basic understanding
+            - Suitable for entry-level candidates or freshers
+            """,
+    'medium': """
+            🟡 DIFFICULTY LEVEL: MEDIUM
+            - Questions should test intermediate understanding and application
+            - Include scenarios that require applying knowledge to solve problems
+            - MCQ options should require careful thinking to differentiate
+            - Balance between knowledge recall and practical application
+            - Suitable for candidates with 1-3 years of experience
+            """,
+    'hard': """
+            🔴 DIFFICULTY LEVEL: HARD
+            - Questions should test advanced concepts and deep understanding
+            - Include complex scenarios requiring analysis and critical thinking
+            - MCQ options should be challenging with subtle differences
+            - Focus on problem-solving, analysis, and evaluation
+            - Include edge cases and real-world complex scenarios
+            - Suitable for senior/experienced candidates
+            """,
+    'mixed': """
+            🎯 DIFFICULTY LEVEL: MIXED (Progressive)
+            - Include a mix of easy, medium, and hard questions
+            - Start with easier questions and progressively increase difficulty
+            - Distribution: approximately 30% easy, 40% medium, 30% hard
+            - This provides a comprehensive assessment across all competency levels
+            """
+}
+
+
+# Section descriptions for the generation prompt, parsed once at import ($department / $position are filled per call)
+_SECTION_DESCRIPTIONS = {
+    'technical': string.Template("""
+            Technical skills and knowledge specific to $position in $department:
+            - Programming concepts, algorithms, and data structures
+            - System design and architecture
+            - Industry best practices and methodologies
+            - Tools and technologies used in $department
+            - Problem-solving scenarios relevant to $position
+            - Current trends and challenges in $department
+            """),
+    'english': string.Template("""
+            English Language Proficiency:
+            - Grammar and sentence structure
+            - Vocabulary and word usage
+            - Reading comprehension
+            - Writing skills and communication
+            - Business English and professional communication
+            - Spelling and punctuation
+            """),
+    'mathematics': string.Template("""
+            Mathematics and Quantitative Skills:
+            - Basic arithmetic and algebra
+            - Statistics and probability
+            - Logical reasoning and problem solving
+            - Data interpretation and analysis
+            - Mathematical concepts relevant to the workplace
+            - Numerical reasoning
+            """),
+    'bengali': string.Template("""
+            Bengali Language Skills:
+            - Grammar and sentence construction (ব্যাকরণ এবং বাক্য গঠন)
+            - Vocabulary and comprehension (শব্দভাণ্ডার এবং বোধগম্যতা)
+            - Bengali literature basics (বাংলা সাহিত্যের মূল বিষয়)
+            - Translation skills (অনুবাদ দক্ষতা)
+            - Professional Bengali communication (পেশাদার বাংলা যোগাযোগ)
+            - Cultural and linguistic knowledge (সাংস্কৃতিক ও ভাষাগত জ্ঞান)
+            """),
+    'general_knowledge': string.Template("""
+            General Knowledge and Current Affairs:
+            - Current events and news (local and international)
+            - History, geography, and culture
+            - Science and technology awareness
+            - Sports and entertainment
+            - Government and politics
+            - Business and economics basics
+            """),
+    'logical_reasoning': string.Template("""
+            Logical Reasoning and Intelligence:
+            - Pattern recognition and sequences
+            - Analytical thinking and problem solving
+            - Critical thinking skills
+            - Decision making scenarios
+            - Abstract reasoning
+            """)
+}
+
+_CUSTOM_SECTION_DESCRIPTION = string.Template("""
+            Custom Section: $display_name
+            This is a custom section for $position in $department.
+            Generate questions based on the syllabus/requirements provided.
+            Focus on practical knowledge and professional skills relevant to this custom topic.
+            """)
+
+_DEFAULT_SECTION_DESCRIPTION = string.Template("""
+        Professional Skills for $position:
+        - Industry knowledge and best practices
+        - Professional ethics and communication
+        - Problem-solving and analytical thinking
+        - Leadership and teamwork skills
+        - Project management basics
+        - Relevant subject matter expertise
+        """)
+
+
+@lru_cache(maxsize=256)
+def _section_description(section_type: str, department: str, position: str, custom_display_name: Optional[str] = None) -> str:
+    """Substitute a section description; memoized because the same sections recur for a department/position"""
+    if custom_display_name is not None:
+        return _CUSTOM_SECTION_DESCRIPTION.substitute(
+            display_name=custom_display_name, department=department, position=position
+        )
+    return _SECTION_DESCRIPTIONS.get(section_type, _DEFAULT_SECTION_DESCRIPTION).substitute(
+        department=department, position=position
+    )
+
+
+# Evaluation focus per section type, included with each answer in evaluation prompts
+_SECTION_CONTEXTS = {
+    'english': "Focus on grammar, vocabulary, communication skills, and language proficiency.",
+    'mathematics': "Focus on mathematical accuracy, problem-solving approach, and correct calculations.",
+    'bengali': "Focus on Bengali language skills, grammar, and cultural understanding.",
+    'general_knowledge': "Focus on factual accuracy and breadth of knowledge.",
+    'logical_reasoning': "Focus on logical thinking, problem-solving approach, and reasoning skills."
+}
+_CUSTOM_SECTION_CONTEXT = "Focus on accuracy, completeness, and professional knowledge relevant to this custom section."
+_DEFAULT_SECTION_CONTEXT = "Focus on technical accuracy and professional knowledge."
+
+# Section generation prompt, compiled once at import. It is rendered in two segments: the
+# invariant instructions come first so consecutive section requests share the longest
+# possible prefix (Groq caches matching prompt prefixes automatically), followed by the
+# per-section body
+_PROMPT_ENVIRONMENT = jinja2.Environment(autoescape=False, trim_blocks=True, keep_trailing_newline=True)
+_SECTION_PROMPT_PREFIX_TEMPLATE = _PROMPT_ENVIRONMENT.from_string("""
+        🔥 CRITICAL JSON FORMAT REQUIREMENTS:
+        1. Return ONLY a valid JSON object with a "questions" array, nothing else
+        2. NO trailing commas in arrays or objects
+        3. ALL strings must be properly escaped
+        4. Use the EXACT structure shown below
+        5. Keep content concise but meaningful
+        6. For essay questions, keep expected_answer under 500 words
+        7. Mix single-answer and multi-select MCQs randomly (do NOT group them together)
+
+        🔢 MCQ OPTIONS REQUIREMENT:
+        Each MCQ question MUST have exactly {{ mcq_options_count }} options (labeled {{ option_letters | join(', ') }}).
+
+        Format your response as a JSON object with this exact structure:
+        {"questions": [
+            {
+                "type": "mcq",
+                "question": "Single-answer question text here",
+                "options": [{{ example_options }}],
+                "correct_answer": 0,
+                "is_multi_select": false,
+                "marks": <MCQ marks given below>,
+                "explanation": "Brief explanation of why this is correct"
+            },
+            {
+                "type": "mcq",
+                "question": "Multi-select question text here (select all that apply)",
+                "options": [{{ example_options }}],
+                "correct_answers": {{ example_correct_indices }},
+                "is_multi_select": true,
+                "marks": <MCQ marks given below>,
+                "explanation": "Brief explanation of why these options are correct"
+            },
+            {
+                "type": "short",
+                "question": "Short answer question text here",
+                "marks": <short answer marks given below>,
+                "expected_answer": "Expected answer or key points",
+                "evaluation_criteria": "Criteria for evaluating the answer"
+            },
+            {
+                "type": "essay",
+                "question": "Essay question text here",
+                "marks": <essay marks given below>,
+                "expected_answer": "Expected answer structure and key points (keep under 500 words)",
+                "evaluation_criteria": "Detailed criteria for evaluating the essay"
+            }
+        ]}
+
+        IMPORTANT REQUIREMENTS:
+        - Each MCQ MUST have exactly {{ mcq_options_count }} options
+        - For SINGLE-ANSWER MCQs: Set "is_multi_select": false and "correct_answer" as index ({{ valid_indices }})
+        - For MULTI-SELECT MCQs: Set "is_multi_select": true and "correct_answers" as array of indices (e.g., {{ example_correct_indices }})
+        - Multi-select questions should clearly indicate "(select all that apply)" or similar in the question text
+        - Mix single-answer and multi-select MCQs randomly throughout the questions
+        - For short and essay questions, provide clear evaluation criteria
+        - Questions should test different competency levels (knowledge, application, analysis)
+        - Ensure cultural sensitivity and professional appropriateness
+        - NO trailing commas anywhere in the JSON
+        - Keep essay expected_answer concise (under 500 words)
+
+""")
+_SECTION_PROMPT_BODY_TEMPLATE = _PROMPT_ENVIRONMENT.from_string("""        Create an exam section for {{ display_section_name }} SKILLS for the position of {{ position }} in the {{ department }} department.
+
+        {{ language_instruction }}
+
+        {{ difficulty_instruction }}
+{% if custom_instructions %}
+
+            📋 ADMIN'S CUSTOM INSTRUCTIONS (IMPORTANT):
+            {{ custom_instructions }}
+
+            ⚠️ Please follow these custom instructions provided by the exam administrator when generating questions.
+{% endif %}
+
+        Generate exactly:
+        - {{ mcq_count }} Single-Answer MCQ (Multiple Choice Questions with ONE correct answer) - {{ mcq_marks }} marks each
+{% if multi_select_count > 0 %}
+        - {{ multi_select_count }} Multi-Select MCQ (questions with multiple correct answers) - {{ mcq_marks }} marks each
+          ⚠️ For multi-select MCQs: Set "is_multi_select": true and provide "correct_answers" as an array of indices (e.g., [0, 2])
+          Multi-select questions should have 2-{{ [3, mcq_options_count - 1] | min }} correct options out of {{ mcq_options_count }}.
+{% endif %}
+        - {{ short_count }} Short Answer Questions - {{ short_marks }} marks each
+        - {{ essay_count }} Essay/Long Answer Questions - {{ essay_marks }} marks each
+
+        {{ section_description }}
+{% if syllabus %}
+
+            🎯 CUSTOM SYLLABUS/REQUIREMENTS (HIGHEST PRIORITY):
+            {{ syllabus }}
+
+            ⚠️ CRITICAL INSTRUCTION: All questions MUST be based primarily on the custom syllabus above.
+            The syllabus topics take HIGHEST PRIORITY over general section descriptions.
+            Focus specifically on the topics, technologies, and requirements mentioned in the custom syllabus.
+            Ensure every question directly relates to the specified syllabus content.
+{% endif %}
+        - ALL content must be in {{ target_language | upper }} language as specified above
+{% if syllabus %}
+        - Every question must directly relate to the specified syllabus content
+{% endif %}
+
+        🔥 CRITICAL:
+        1. The language requirement is NON-NEGOTIABLE. Use {{ target_language | upper }} language for ALL content.
+        2. Return only valid JSON - no markdown, no extra text, no code blocks.
+        3. Ensure no trailing commas in any arrays or objects.
+        4. Generate exactly {{ mcq_count }} single-answer MCQs and {{ multi_select_count }} multi-select MCQs.
+        5. Each MCQ MUST have exactly {{ mcq_options_count }} options - no more, no less.
+
+        Return only the JSON object, no additional text or formatting.
+        """)
+
+
+@lru_cache(maxsize=8)
+def _section_prompt_prefix(mcq_options_count: int) -> str:
+    """Render the invariant prompt prefix; it only depends on the options count, so it is built once per count.
+
+    Per-section values such as marks belong in the body - anything rendered here would end the
+    prefix shared with sections that differ in it.
+    """
+    option_letters = _OPTION_LETTERS[:mcq_options_count]
+    return _SECTION_PROMPT_PREFIX_TEMPLATE.render(
+        mcq_options_count=mcq_options_count,
+        option_letters=option_letters,
+        example_options=', '.join([f'"Option {letter}"' for letter in option_letters]),
+        valid_indices=', '.join([str(i) for i in range(mcq_options_count)]),
+        example_correct_indices=[0, min(2, mcq_options_count - 1)],  # First and third (or last) option
+    )
+
+
+# One HTTP/2 connection pool shared by every Groq client (primary and backup keys alike),
+# so failovers and new analyzers reuse warm TLS connections instead of handshaking again
+_HTTP_CLIENT = httpx.Client(
+    http2=True,
+    limits=httpx.Limits(max_connections=20, max_keepalive_connections=10)
+)
+
+
+@lru_cache(maxsize=4)
+def _get_groq_client(api_key: str) -> Groq:
+    """Return the cached Groq client for an API key (SDK retries disabled - we handle backoff ourselves)"""
+    return Groq(api_key=api_key, max_retries=0, http_client=_HTTP_CLIENT)
+
+
+def _run_sync(coro):
+    """Run a coroutine to completion from synchronous code.
+
+    Uses asyncio.run() when no event loop is running in this thread. When called from
+    inside a running loop (e.g. an async FastAPI route) the coroutine is run on a
+    private loop in a worker thread instead, since event loops cannot be nested.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        loop_running = False
+    else:
+        loop_running = True
+
+    if not loop_running:
+        return asyncio.run(coro)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
+
+
+def _validate_one(questions: List[Dict], section_config: Dict) -> VReason:
+    """Validate one section's generated questions, returning VReason.OK or the first failure found.
+
+    Detailed diagnostics are only formatted and printed when VALIDATION_DEBUG is set.
+    """
+    try:
+        if not isinstance(questions, list):
+            if VALIDATION_DEBUG:
+                print(f"❌ Questions is not a list: {type(questions)}")
+            return VReason.NOT_LIST
+
+        expected_single_mcq = section_config.get('mcq_count', 0)
+        expected_multi_mcq = section_config.get('multi_select_count', 0)
+        expected_short = section_config.get('short_count', 0)
+        expected_essay = section_config.get('essay_count', 0)
+
+        # Check total count matches
+        total_expected = expected_single_mcq + expected_multi_mcq + expected_short + expected_essay
+        if len(questions) != total_expected:
+            if VALIDATION_DEBUG:
+                print(f"❌ Total question count mismatch: Expected {total_expected}, Got {len(questions)}")
+            return VReason.COUNT_MISMATCH
+
+        # Structural checks (keys, types, option counts, index ranges) via the compiled schema
+        try:
+            _validate_questions_schema(questions)
+        except fastjsonschema.JsonSchemaValueException as e:
+            if VALIDATION_DEBUG:
+                print(f"❌ Question structure invalid: {e.message}")
+            return VReason.INVALID_STRUCTURE
+
+        # Count question types and check answer indices against each MCQ's own options
+        single_mcq_count = multi_mcq_count = short_count = essay_count = 0
+        for i, q in enumerate(questions):
+            question_type = _TYPE_MAP[q['type']]  # the schema guarantees a known type
+            if question_type == _TYPE_MCQ:
+                options_count = len(q['options'])
+                # Read the flag once; it drives both the count and which answer field is checked
+                is_multi = q.get('is_multi_select', False)
+                # Plain bounds tests against the actual options count; type() rather than
+                # isinstance() because JSON Schema counts 1.0 (and isinstance counts True) as an int
+                if is_multi:
+                    multi_mcq_count += 1
+                    for ans in q['correct_answers']:
+                        if type(ans) is not int or not 0 <= ans < options_count:
+                            if VALIDATION_DEBUG:
+                                print(f"❌ Multi-select MCQ correct_answers contains invalid index in question {i}: {ans} (options: {options_count})")
+                            return VReason.ANSWER_OUT_OF_RANGE
+                else:
+                    single_mcq_count += 1
+                    ans = q['correct_answer']
+                    if type(ans) is not int or not 0 <= ans < options_count:
+                        if VALIDATION_DEBUG:
+                            print(f"❌ MCQ correct_answer invalid in question {i}: {ans} (options: {options_count})")
+                        return VReason.ANSWER_OUT_OF_RANGE
+            elif question_type == _TYPE_SHORT:
+                short_count += 1
+            else:
+                essay_count += 1
+
+        # More flexible count validation - allow slight variations
+        # Total MCQ count should match (single + multi)
+        total_mcq_expected = expected_single_mcq + expected_multi_mcq
+        total_mcq_got = single_mcq_count + multi_mcq_count
+        mcq_diff = abs(total_mcq_got - total_mcq_expected)
+        short_diff = abs(short_count - expected_short)
+        essay_diff = abs(essay_count - expected_essay)
+
+        if mcq_diff > 1 or short_diff > 1 or essay_diff > 1:
+            if VALIDATION_DEBUG:
+                print(f"❌ Count mismatch: Expected MCQ:{total_mcq_expected} (single:{expected_single_mcq}, multi:{expected_multi_mcq}), Short:{expected_short}, Essay:{expected_essay}")
+                print(f"❌ Got MCQ:{total_mcq_got} (single:{single_mcq_count}, multi:{multi_mcq_count}), Short:{short_count}, Essay:{essay_count}")
+            return VReason.TYPE_COUNT_MISMATCH
+
+        return VReason.OK
+
+    except Exception as e:
+        if VALIDATION_DEBUG:
+            print(f"❌ Validation error: {str(e)}")
+        return VReason.ERROR
+
+
+def _compute_backoff(attempt: int, retry_after: Optional[float] = None) -> float:
+    """Return the delay before the next retry: the server's Retry-After if known, else exponential backoff with jitter"""
+    if retry_after is not None:
+        return min(retry_after, MAX_BACKOFF_SECONDS)
+    return min(2 ** attempt + random.random(), MAX_BACKOFF_SECONDS)
+
+
+def _retry_after_seconds(error: Exception) -> Optional[float]:
+    """Extract the wait time Groq asks for on a rate limit error, from the retry-after header or the error message"""
+    if not isinstance(error, RateLimitError):
+        return None
+
+    response = getattr(error, 'response', None)
+    if response is not None:
+        header = response.headers.get("retry-after")
+        if header:
+            try:
+                return float(header)
+            except ValueError:
+                pass
+
+    match = _TRY_AGAIN_RE.search(str(error))
+    if match:
+        minutes, seconds = match.groups()
+        return int(minutes or 0) * 60 + float(seconds)
+    return None
+
+
+def _estimate_tokens(text: str) -> int:
+    """Cheap token estimate for a prompt: ~4 UTF-8 bytes per token.
+
+    Equivalent to ~4 characters per token for English, while Bengali (3 bytes per
+    character and poorly covered by the Llama 3 vocabulary) is not badly undercounted.
+    """
+    return len(text.encode('utf-8')) // 4
+
+
+def _expected_completion_tokens(mcq_count: int, multi_select_count: int, short_count: int, essay_count: int) -> int:
+    """Estimated completion size for generating a section with the given question counts"""
+    return ((mcq_count + multi_select_count) * MCQ_COMPLETION_TOKENS
+            + short_count * SHORT_COMPLETION_TOKENS
+            + essay_count * ESSAY_COMPLETION_TOKENS)
+
+
+def _split_section_config(section_config: Dict):
+    """Split a section's question counts into two halves that each get at least one
+    question when the section has two or more (odd counts alternate between halves)"""
+    first = dict(section_config)
+    second = dict(section_config)
+    carry = 0
+    for key in ('mcq_count', 'multi_select_count', 'short_count', 'essay_count'):
+        count = section_config.get(key, 0)
+        first[key] = (count + carry) // 2
+        second[key] = count - first[key]
+        carry ^= count & 1
+    return first, second
+
+
+def _as_answer_number(value) -> Optional[int]:
+    """An evaluation's answer_number as an int (the model sometimes quotes it), or None"""
+    if type(value) is int:
+        return value
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value)
+    return None
+
+
+def _as_marks(value) -> Optional[float]:
+    """An evaluation's marks_awarded as a finite number, or None if missing or not numeric"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, str):
+        try:
+            value = float(value.strip())
+        except ValueError:
+            return None
+    if not isinstance(value, (int, float)) or not math.isfinite(value):
+        return None
+    return value
+
+
+def _failed_evaluation(feedback: str, improvements: str, details: str) -> Dict:
+    """Build the zero-mark result used when AI evaluation fails and the answer needs manual review"""
+    return {
+        'marks_awarded': 0,
+        'feedback': feedback,
+        'strengths': '',
+        'improvements': improvements,
+        'evaluation_details': details,
+        'ai_evaluated': False,
+        'needs_manual_review': True
+    }
+
+
+def _question_fingerprint(question: Dict) -> str:
+    """Hash of everything the evaluation prompt grades an answer against.
+
+    Two questions with the same wording but a different expected answer, criteria, marks or
+    section get different fingerprints, and so does a question after an admin edits it.
+    """
+    content = orjson.dumps([
+        question['question'], question.get('type'), question['marks'], question.get('section_type'),
+        question.get('expected_answer'), question.get('evaluation_criteria'),
+    ])
+    return hashlib.sha256(content).hexdigest()
+
+
+def _simhash(words: List[str]) -> int:
+    """64-bit SimHash of a lowercased answer over its whitespace-separated words and word bigrams.
+
+    Bigrams keep word order significant ("A is faster than B" vs "B is faster than A")
+    while staying stable under the small edits typical of copied answers.
+    """
+    features = words + [words[i] + ' ' + words[i + 1] for i in range(len(words) - 1)]
+    weights = [0] * 64
+    for feature in features:
+        digest = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), 'big')
+        for bit in range(64):
+            weights[bit] += 1 if digest >> bit & 1 else -1
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+
+class AnswerSimilarityIndex:
+    """Remembers AI evaluations per question so near-identical answers (copy-paste, shared
+    study material) can reuse an evaluation instead of making another Groq call."""
+
+    __slots__ = ('_entries', '_exact', '_lock')
+
+    def __init__(self):
+        self._entries = {}  # question fingerprint -> deque of (simhash, word count, evaluation)
+        # (question fingerprint, whitespace-collapsed answer) -> orjson-encoded evaluation. Case,
+        # signs and operators are kept ("CO" vs "Co", "x > y" vs "x < y"). Only evaluations that
+        # passed validation are stored, so hits are decoded and returned without re-checking
+        self._exact = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(question: Dict):
+        return (_question_fingerprint(question),)
+
+    def lookup(self, question: Dict, candidate_answer: str) -> Optional[Dict]:
+        """Return a copy of the evaluation of a near-identical earlier answer, if any"""
+        key = self._key(question)
+        with self._lock:
+            blob = self._exact.get(key + (' '.join(candidate_answer.split()),))
+        if blob is not None:
+            return orjson.loads(blob)
+
+        # Whitespace tokens: \w+ would split Bengali words at every vowel sign and drop operators
+        words = candidate_answer.lower().split()
+        if len(words) < SIMHASH_MIN_WORDS:
+            return None
+        fingerprint = _simhash(words)
+
+        with self._lock:
+            best = None
+            for other_fingerprint, word_count, evaluation in self._entries.get(key, ()):
+                if word_count < SIMHASH_MIN_WORDS:
+                    continue
+                distance = bin(fingerprint ^ other_fingerprint).count('1')
+                if distance <= SIMHASH_MAX_DISTANCE and (best is None or distance < best[0]):
+                    best = (distance, evaluation)
+
+        if best is None:
+            return None
+
+        distance, evaluation = best
+        reused = dict(evaluation)
+        reused['needs_manual_review'] = distance > SIMHASH_TRUSTED_DISTANCE
+        return reused
+
+    def add(self, question: Dict, candidate_answer: str, evaluation: Dict):
+        """Remember a successful AI evaluation for later near-duplicate lookups"""
+        words = candidate_answer.lower().split()
+        blob = orjson.dumps(evaluation)
+        key = self._key(question)
+        with self._lock:
+            self._exact[key + (' '.join(candidate_answer.split()),)] = blob
+            if len(self._exact) > EXACT_EVALUATION_CACHE_SIZE:
+                del self._exact[next(iter(self._exact))]  # drop the oldest entry
+            entries = self._entries.setdefault(key, deque(maxlen=SIMHASH_ENTRIES_PER_QUESTION))
+            entries.append((_simhash(words), len(words), dict(evaluation)))
+
+
+class TokenBucket:
+    """Client-side tokens- and requests-per-minute limiter over a rolling 60 second window.
+
+    Blocks before a request that would exceed either budget instead of letting Groq
+    answer with a 429 after a full round-trip. A tpm or rpm of 0 disables that limit.
+    State is guarded by a threading.Lock (not an asyncio.Lock) because the analyzer is
+    shared by callers on different event loops and threads.
+    """
+
+    __slots__ = ('tpm', 'rpm', 'window_seconds', '_entries', '_used', 'prompt_tokens', 'cached_tokens', '_lock')
+
+    def __init__(self, tpm: int, rpm: int = GROQ_RPM, window_seconds: float = 60.0):
+        self.tpm = tpm
+        self.rpm = rpm
+        self.window_seconds = window_seconds
+        self._entries = deque()  # [timestamp, tokens] per request, oldest first
+        self._used = 0
+        # Billed prompt tokens and how many of them Groq served from its prompt cache
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self._lock = threading.Lock()
+
+    def _evict(self, now: float):
+        while self._entries and now - self._entries[0][0] >= self.window_seconds:
+            self._used -= self._entries.popleft()[1]
+
+    def _try_reserve(self, tokens: int):
+        """Reserve tokens if they fit. Returns (entry, 0) on success or (None, seconds_to_wait)."""
+        with self._lock:
+            now = time.monotonic()
+            self._evict(now)
+            # An oversized request is let through on an empty window rather than blocking forever
+            fits_tpm = not self.tpm or self._used + tokens <= self.tpm or not self._entries
+            fits_rpm = not self.rpm or len(self._entries) < self.rpm
+            if fits_tpm and fits_rpm:
+                entry = [now, tokens]
+                self._entries.append(entry)
+                self._used += tokens
+                return entry, 0.0
+            return None, self._entries[0][0] + self.window_seconds - now
+
+    async def acquire(self, tokens: int) -> list:
+        """Wait until `tokens` fit in the current window and reserve them"""
+        while True:
+            entry, wait = self._try_reserve(tokens)
+            if entry is not None:
+                return entry
+            print(f"⏳ Rate budget exhausted ({self.tpm} TPM / {self.rpm} RPM) - waiting {wait:.1f}s before calling Groq")
+            await asyncio.sleep(wait)
+
+    def record(self, entry: list, actual_tokens: int, prompt_tokens: int = 0, cached_tokens: int = 0):
+        """Replace a reservation's estimate with the token count Groq actually billed"""
+        with self._lock:
+            self._used += actual_tokens - entry[1]
+            entry[1] = actual_tokens
+            self.prompt_tokens += prompt_tokens
+            self.cached_tokens += cached_tokens
+
+    def cache_hit_rate(self) -> float:
+        """Percentage of billed prompt tokens served from Groq's prompt cache"""
+        return self.cached_tokens / self.prompt_tokens * 100 if self.prompt_tokens else 0.0
+
 
 class GroqAnalyzer:
+    __slots__ = (
+        'primary_api_key', 'backup_api_key',
+        '_primary_client', '_backup_client', '_clients', '_client_idx', '_cooldown_until', '_dispatch_lock',
+        'model_name', 'temperature', '_rate_limiters', '_answer_index',
+        '_current_difficulty_level', '_current_custom_instructions', '_mcq_options_count'
+    )
+
     def __init__(self, api_key: str, backup_api_key: str = None):
         """Initialize Groq API with primary and optional backup key for failover"""
         self.primary_api_key = api_key
         self.backup_api_key = backup_api_key
-        self.current_api_key = api_key
-        self.using_backup = False
-        
-        # Initialize Groq client
-        self.client = Groq(api_key=self.current_api_key)
+
+        # Build both clients up front; requests are spread round-robin over every key
+        # that is not cooling down after a rate limit, so the backup quota is not left idle
+        self._primary_client = _get_groq_client(api_key)
+        self._backup_client = _get_groq_client(backup_api_key) if backup_api_key else None
+        self._clients = [client for client in (self._primary_client, self._backup_client) if client]
+        self._client_idx = 0
+        self._cooldown_until = [0.0] * len(self._clients)
+        self._dispatch_lock = threading.Lock()
         
         # Model configuration
         self.model_name = "llama-3.3-70b-versatile"
         self.temperature = 0.7
 
+        # Per-exam generation settings (overwritten by generate_questions_by_sections)
+        self._current_difficulty_level = 'medium'
+        self._current_custom_instructions = ''
+        self._mcq_options_count = 4
+
+        # Preemptive rate limiting so we wait locally instead of eating 429s (quotas are per key)
+        self._rate_limiters = [TokenBucket(tpm=GROQ_TPM) for _ in self._clients]
+
+        # Evaluations of earlier answers, reused for near-duplicate answers
+        self._answer_index = AnswerSimilarityIndex()
+
         if backup_api_key:
-            print("🔑 Dual API key mode enabled - backup key configured for failover")
+            print("🔑 Dual API key mode enabled - requests are shared across both keys")
         else:
             print("🔑 Single API key mode - no backup key configured")
 
-    def _switch_to_backup_key(self) -> bool:
-        """Switch to backup API key. Returns True if switched successfully."""
-        if not self.backup_api_key:
-            print("⚠️ No backup API key configured - cannot failover")
-            return False
+    def _key_label(self, index: int) -> str:
+        return "primary key" if index == 0 else "backup key"
 
-        if self.using_backup:
-            print("⚠️ Already using backup API key - no more failover options")
-            return False
-
-        print("🔄 Switching to backup API key...")
-        self.current_api_key = self.backup_api_key
-        self.using_backup = True
-        
-        # Re-initialize client with backup key
-        self.client = Groq(api_key=self.current_api_key)
-        
-        print("✅ Successfully switched to backup API key")
-        return True
+    def _pick_client(self) -> int:
+        """Return the index of the next client in round-robin order, skipping keys that are cooling down.
 
-    def _reset_to_primary_key(self):
-        """Reset back to primary API key (for next operation)"""
-        if self.using_backup:
-            self.current_api_key = self.primary_api_key
-            self.using_backup = False
-            self.client = Groq(api_key=self.current_api_key)
-            print("🔄 Reset to primary API key for next operation")
+        If every key is cooling down, the one that becomes available first is returned.
+        """
+        with self._dispatch_lock:
+            now = time.monotonic()
+            count = len(self._clients)
+            for offset in range(count):
+                index = (self._client_idx + offset) % count
+                if self._cooldown_until[index] <= now:
+                    self._client_idx = (index + 1) % count
+                    return index
+            return min(range(count), key=self._cooldown_until.__getitem__)
+
+    def _has_available_client(self) -> bool:
+        """Check whether any API key is currently outside its rate limit cooldown"""
+        now = time.monotonic()
+        with self._dispatch_lock:
+            return any(until <= now for until in self._cooldown_until)
+
+    def _cool_down(self, index: int, error: Exception):
+        """Take a key out of rotation for as long as Groq asks after a quota/rate limit error"""
+        if not self._is_quota_error(error):
+            return
+        delay = _compute_backoff(0, _retry_after_seconds(error))
+        with self._dispatch_lock:
+            self._cooldown_until[index] = time.monotonic() + delay
+        print(f"🔴 Quota/rate limit hit on {self._key_label(index)} - cooling it down for {delay:.1f}s")
 
     def _is_quota_error(self, error: Exception) -> bool:
         """Check if the error is a quota exceeded or rate limit error"""
-        error_str = str(error).lower()
-        quota_indicators = [
-            'rate limit', 'too many requests', '429', 
-            'quota exceeded', 'resource exhausted'
-        ]
-        return any(indicator in error_str for indicator in quota_indicators)
+        if isinstance(error, RateLimitError):
+            return True
+        if isinstance(error, APIStatusError):
+            return error.status_code == 429
+        # Errors without a status code (e.g. wrapped by another error) only carry it in the message
+        return isinstance(error, GroqError) and '429' in str(error)
 
     def generate_questions_by_sections(self, department: str, position: str, sections_structure: Dict, exam_language: str = 'english', difficulty_level: str = 'medium', custom_instructions: str = '', mcq_options_count: int = 4) -> Dict:
+        """Synchronous entrypoint for agenerate_questions_by_sections (kept for backward compatibility)"""
+        return _run_sync(self.agenerate_questions_by_sections(
+            department, position, sections_structure, exam_language,
+            difficulty_level=difficulty_level,
+            custom_instructions=custom_instructions,
+            mcq_options_count=mcq_options_count
+        ))
+
+    async def agenerate_questions_by_sections(self, department: str, position: str, sections_structure: Dict, exam_language: str = 'english', difficulty_level: str = 'medium', custom_instructions: str = '', mcq_options_count: int = 4) -> Dict:
         """Generate exam questions organized by sections with language support, difficulty level, custom instructions, retry logic, and API key failover.
 
+        Sections are generated concurrently, bounded by GROQ_CONCURRENCY in-flight requests.
+
         Returns a dict with:
         - 'questions': Dict of section_type -> list of questions (for successful sections)
         - 'failed_sections': List of section names that failed to generate
@@ -88,50 +917,30 @@ class GroqAnalyzer:
         if custom_instructions:
             print(f"📝 Custom instructions provided: {custom_instructions[:80]}...")
 
-        for section_type, section_config in sections_structure.items():
-            print(f"🤖 Generating {section_type} questions in {exam_language} language...")
-
-            # Retry logic for each section with API key failover
-            max_retries = 3
-            questions = None
-            failover_attempted = False
-
-            for attempt in range(max_retries):
-                try:
-                    questions = self._generate_section_questions(
-                        department, position, section_type, section_config, exam_language,
-                        difficulty_level, custom_instructions
-                    )
+        # Exam-wide prompt fields are bound once and shared by every section
+        prompt_builder = self._make_prompt_builder(
+            department, position, exam_language, difficulty_level, custom_instructions, self._mcq_options_count
+        )
 
-                    if questions:
-                        print(f"✅ {section_type.title()} questions generated successfully in {exam_language} (attempt {attempt + 1})!")
-                        break
-                    else:
-                        print(f"⚠️ Attempt {attempt + 1} failed for {section_type}, retrying...")
-                        if attempt < max_retries - 1:
-                            time.sleep(1)  # Brief pause between retries
-
-                except Exception as e:
-                    print(f"⚠️ Attempt {attempt + 1} failed for {section_type}: {str(e)}")
-
-                    # Check if this is a quota error and try to failover
-                    if self._is_quota_error(e) and not failover_attempted:
-                        print(f"🔴 Quota/rate limit error detected for {section_type}")
-                        if self._switch_to_backup_key():
-                            failover_attempted = True
-                            print(f"🔄 Retrying {section_type} with backup API key...")
-                            # Don't count this as a failed attempt - restart attempts with backup key
-                            attempt = -1
-                            continue
+        # Created per call: asyncio primitives must not outlive the event loop they are used on
+        sem = asyncio.Semaphore(GROQ_CONCURRENCY)
+        tasks = [
+            self._agenerate_section_with_retry(
+                sem, department, position, section_type, section_config, exam_language,
+                difficulty_level, custom_instructions, prompt_builder
+            )
+            for section_type, section_config in sections_structure.items()
+        ]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
 
-                    if attempt < max_retries - 1:
-                        time.sleep(1)
-                    continue
+        for section_type, questions in zip(sections_structure, results):
+            if isinstance(questions, Exception):
+                print(f"❌ Unexpected error generating {section_type} section: {str(questions)}")
+                questions = None
 
             if questions:
                 all_sections_questions[section_type] = questions
             else:
-                print(f"❌ Failed to generate questions for {section_type} section after {max_retries} attempts")
                 failed_sections.append(section_type)
 
         total_sections = len(sections_structure)
@@ -147,7 +956,56 @@ class GroqAnalyzer:
             'success': len(failed_sections) == 0
         }
 
+    async def _agenerate_section_with_retry(self, sem: asyncio.Semaphore, department: str, position: str, section_type: str, section_config: Dict, exam_language: str, difficulty_level: str, custom_instructions: str, prompt_builder: Callable[..., str] = None) -> Optional[List[Dict]]:
+        """Generate one section with retry logic and API key failover, holding a semaphore slot only while a request is in flight"""
+        print(f"🤖 Generating {section_type} questions in {exam_language} language...")
+
+        max_retries = 3
+        questions = None
+
+        for attempt in range(max_retries):
+            try:
+                async with sem:
+                    questions = await self._agenerate_section_questions(
+                        department, position, section_type, section_config, exam_language,
+                        difficulty_level, custom_instructions, prompt_builder=prompt_builder
+                    )
+
+                if questions:
+                    print(f"✅ {section_type.title()} questions generated successfully in {exam_language} (attempt {attempt + 1})!")
+                    break
+                else:
+                    print(f"⚠️ Attempt {attempt + 1} failed for {section_type}, retrying...")
+                    if attempt < max_retries - 1:
+                        await asyncio.sleep(_compute_backoff(attempt))
+
+            except Exception as e:
+                print(f"⚠️ Attempt {attempt + 1} failed for {section_type}: {str(e)}")
+
+                # On a quota error, retry straight away if another key is still available
+                if self._is_quota_error(e) and self._has_available_client():
+                    print(f"🔄 Retrying {section_type} with another API key...")
+                    continue
+
+                if attempt < max_retries - 1:
+                    delay = _compute_backoff(attempt, _retry_after_seconds(e))
+                    print(f"⏳ Waiting {delay:.1f}s before retrying {section_type}...")
+                    await asyncio.sleep(delay)
+                continue
+
+        if not questions:
+            print(f"❌ Failed to generate questions for {section_type} section after {max_retries} attempts")
+        return questions
+
     def generate_single_section(self, department: str, position: str, section_type: str, section_config: Dict, exam_language: str = 'english', difficulty_level: str = 'medium', custom_instructions: str = '') -> Dict:
+        """Synchronous entrypoint for agenerate_single_section (kept for backward compatibility)"""
+        return _run_sync(self.agenerate_single_section(
+            department, position, section_type, section_config, exam_language,
+            difficulty_level=difficulty_level,
+            custom_instructions=custom_instructions
+        ))
+
+    async def agenerate_single_section(self, department: str, position: str, section_type: str, section_config: Dict, exam_language: str = 'english', difficulty_level: str = 'medium', custom_instructions: str = '') -> Dict:
         """Generate questions for a single section. Used for regenerating failed or specific sections.
 
         Returns a dict with:
@@ -159,14 +1017,16 @@ class GroqAnalyzer:
 
         max_retries = 3
         questions = None
-        failover_attempted = False
         last_error = None
+        prompt_builder = self._make_prompt_builder(
+            department, position, exam_language, difficulty_level, custom_instructions, self._mcq_options_count
+        )
 
         for attempt in range(max_retries):
             try:
-                questions = self._generate_section_questions(
+                questions = await self._agenerate_section_questions(
                     department, position, section_type, section_config, exam_language,
-                    difficulty_level, custom_instructions
+                    difficulty_level, custom_instructions, prompt_builder=prompt_builder
                 )
 
                 if questions:
@@ -180,23 +1040,21 @@ class GroqAnalyzer:
                     print(f"⚠️ Attempt {attempt + 1} failed for {section_type}, retrying...")
                     last_error = "Generation returned empty result"
                     if attempt < max_retries - 1:
-                        time.sleep(1)
+                        await asyncio.sleep(_compute_backoff(attempt))
 
             except Exception as e:
                 last_error = str(e)
                 print(f"⚠️ Attempt {attempt + 1} failed for {section_type}: {last_error}")
 
-                # Check if this is a quota error and try to failover
-                if self._is_quota_error(e) and not failover_attempted:
-                    print(f"🔴 Quota/rate limit error detected for {section_type}")
-                    if self._switch_to_backup_key():
-                        failover_attempted = True
-                        print(f"🔄 Retrying {section_type} with backup API key...")
-                        attempt = -1
-                        continue
+                # On a quota error, retry straight away if another key is still available
+                if self._is_quota_error(e) and self._has_available_client():
+                    print(f"🔄 Retrying {section_type} with another API key...")
+                    continue
 
                 if attempt < max_retries - 1:
-                    time.sleep(1)
+                    delay = _compute_backoff(attempt, _retry_after_seconds(e))
+                    print(f"⏳ Waiting {delay:.1f}s before retrying {section_type}...")
+                    await asyncio.sleep(delay)
                 continue
 
         print(f"❌ Failed to regenerate {section_type} section after {max_retries} attempts")
@@ -206,254 +1064,444 @@ class GroqAnalyzer:
             'error': last_error or "Unknown error during generation"
         }
 
-    def _generate_section_questions(self, department: str, position: str, section_type: str, section_config: Dict, exam_language: str = 'english', difficulty_level: str = 'medium', custom_instructions: str = '') -> Optional[List[Dict]]:
+    async def _agenerate_section_questions(self, department: str, position: str, section_type: str, section_config: Dict, exam_language: str = 'english', difficulty_level: str = 'medium', custom_instructions: str = '', prompt_builder: Callable[..., str] = None) -> Optional[List[Dict]]:
         """Generate questions for a specific section with language support, difficulty level, custom instructions, and custom section handling"""
-        mcq_count = section_config.get('mcq_count', 0)
-        multi_select_count = section_config.get('multi_select_count', 0)  # Multi-select MCQ count
-        short_count = section_config.get('short_count', 0)
-        essay_count = section_config.get('essay_count', 0)
-        mcq_marks = section_config.get('mcq_marks', 1)
-        short_marks = section_config.get('short_marks', 5)
-        essay_marks = section_config.get('essay_marks', 10)
-        syllabus = section_config.get('syllabus', '').strip()
-
-        # For custom sections, log additional info
-        if section_config.get('is_custom'):
-            display_name = section_config.get('display_name', 'Custom Section')
-            print(f"📚 Custom section detected: {display_name}")
+        # Bind config values to locals once; this runs per section and per retry
+        get = section_config.get
+        mcq_count = get('mcq_count', 0)
+        multi_select_count = get('multi_select_count', 0)  # Multi-select MCQ count
+        short_count = get('short_count', 0)
+        essay_count = get('essay_count', 0)
+        mcq_marks = get('mcq_marks', 1)
+        short_marks = get('short_marks', 5)
+        essay_marks = get('essay_marks', 10)
+        syllabus = get('syllabus', '').strip()
+        is_custom = get('is_custom', False)
 
         # Skip sections with no questions
         total_questions = mcq_count + multi_select_count + short_count + essay_count
         if total_questions == 0:
             return []
 
-        # Get mcq_options_count from instance variable (set by generate_questions_by_sections)
-        mcq_options_count = getattr(self, '_mcq_options_count', 4)
+        # For custom sections, log additional info and use the display name in logs
+        if is_custom:
+            print(f"📚 Custom section detected: {get('display_name', 'Custom Section')}")
+            log_name = get('display_name', section_type)
+        else:
+            log_name = section_type
+
+        if prompt_builder is None:
+            # mcq_options_count comes from the instance variable (set by generate_questions_by_sections)
+            prompt_builder = self._make_prompt_builder(
+                department, position, exam_language, difficulty_level, custom_instructions, self._mcq_options_count
+            )
+        response_text = ''
+
+        def build_prompt(syllabus: str) -> str:
+            return prompt_builder(
+                section_type, section_config,
+                mcq_count, multi_select_count, short_count, essay_count,
+                mcq_marks, short_marks, essay_marks,
+                syllabus
+            )
 
         # Generate appropriate prompt
-        prompt = self._create_section_prompt(
-            department, position, section_type,
-            mcq_count, multi_select_count, short_count, essay_count,
-            mcq_marks, short_marks, essay_marks,
-            syllabus, exam_language,
-            section_config,  # Pass section_config for custom section handling
-            difficulty_level,  # Pass difficulty level
-            custom_instructions,  # Pass custom instructions
-            mcq_options_count  # Pass MCQ options count
-        )
+        prompt = build_prompt(syllabus)
+
+        # A request over MAX_REQUEST_TOKENS is rejected no matter how long we wait, so size it
+        # up locally: an oversized syllabus is truncated until the prompt leaves room for the
+        # completion, then sections that are still too big are generated in two halves
+        while syllabus and _estimate_tokens(prompt) > MAX_REQUEST_TOKENS // 2:
+            syllabus = syllabus[:len(syllabus) // 2]
+            print(f"✂️ Syllabus for {log_name} is too long for one request - truncated to {len(syllabus)} characters")
+            prompt = build_prompt(syllabus)
+
+        expected_completion = _expected_completion_tokens(mcq_count, multi_select_count, short_count, essay_count)
+        request_tokens = _estimate_tokens(prompt) + expected_completion
+        if request_tokens > MAX_REQUEST_TOKENS and total_questions > 1:
+            print(f"✂️ {log_name} needs ~{request_tokens} tokens (limit {MAX_REQUEST_TOKENS}) - generating it in two parts")
+            questions = []
+            for part_config in _split_section_config(dict(section_config, syllabus=syllabus)):
+                part = await self._agenerate_section_questions(
+                    department, position, section_type, part_config, exam_language,
+                    difficulty_level, custom_instructions, prompt_builder=prompt_builder
+                )
+                if part is None:
+                    return None
+                questions.extend(part)
+            return questions
 
         try:
-            # Use display name for custom sections in logging
-            log_name = section_config.get('display_name', section_type) if section_config.get('is_custom') else section_type
             print(f"🤖 Generating {log_name} questions in {exam_language} using Groq...")
             if syllabus:
                 print(f"📚 Using custom syllabus: {syllabus[:100]}...")
             
-            # Using Groq chat completion
-            response = self.client.chat.completions.create(
-                messages=[
-                    {
-                        "role": "user",
-                        "content": prompt,
-                    }
-                ],
-                model=self.model_name,
-                temperature=self.temperature,
+            # Reserve the prompt plus the expected completion against the chosen key's budget
+            client_index = self._pick_client()
+            rate_limiter = self._rate_limiters[client_index]
+            reservation = await rate_limiter.acquire(request_tokens)
+
+            # Using Groq chat completion (run in a worker thread so concurrent sections overlap)
+            response_text, usage = await asyncio.to_thread(
+                self._complete, self._clients[client_index], prompt,
+                response_format={"type": "json_object"},
             )
+            if usage:
+                self._record_usage(rate_limiter, reservation, usage)
 
-            response_text = response.choices[0].message.content
-
-            # Clean the response to extract JSON
             response_text = self._clean_json_response(response_text)
 
-            # Parse JSON
-            questions = json.loads(response_text)
+            # JSON mode requires a top-level object, so the questions arrive wrapped
+            questions = orjson.loads(response_text).get('questions')
 
-            # Validate the structure
-            if not self._validate_questions_structure(questions, section_config):
-                print(f"❌ Questions structure validation failed for {section_type}")
-                raise ValueError(f"Invalid questions structure received for {section_type}")
+            # Validate the structure inline - a 100-question section takes 1-2 ms
+            reason = self._check_questions_structure(questions, section_config)
+            if reason:
+                print(f"❌ Questions structure validation failed for {section_type}: {reason.name}")
+                raise ValueError(f"Invalid questions structure received for {section_type} ({reason.name})")
 
             print(f"✅ {log_name.title()} questions generated successfully in {exam_language}!")
             return questions
 
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             print(f"❌ JSON parsing error for {log_name}: {str(e)}")
-            print(f"Raw response: {response_text[:500] if 'response_text' in locals() else 'No response'}...")
+            print(f"Raw response: {response_text[:500] or 'No response'}...")
             return None
+        except GroqError as e:
+            # Let API errors reach the retry loop so it can switch keys or back off
+            self._cool_down(client_index, e)
+            raise
         except Exception as e:
             print(f"❌ Error generating {log_name} questions: {str(e)}")
             return None
 
     def evaluate_subjective_answer(self, question: Dict, candidate_answer: str) -> Dict:
-        """Evaluate short/essay answer using Groq with API key failover"""
-        if not candidate_answer.strip():
-            return {
-                'marks_awarded': 0,
-                'feedback': 'No answer provided.',
-                'strengths': '',
-                'improvements': 'Answer was not provided by the candidate.',
-                'evaluation_details': 'Answer was not provided by the candidate.',
-                'ai_evaluated': True,
-                'needs_manual_review': False
-            }
+        """Synchronous entrypoint for aevaluate_subjective_answer (kept for backward compatibility)"""
+        return _run_sync(self.aevaluate_subjective_answer(question, candidate_answer))
+
+    async def aevaluate_subjective_answer(self, question: Dict, candidate_answer: str) -> Dict:
+        """Evaluate short/essay answer using Groq with API key failover (a batch of one)"""
+        evaluations = await self.aevaluate_subjective_answers_batch([
+            {'question': question, 'candidate_answer': candidate_answer}
+        ])
+        return evaluations[0]
+
+    def evaluate_subjective_answers_batch(self, items: List[Dict]) -> List[Dict]:
+        """Synchronous entrypoint for aevaluate_subjective_answers_batch"""
+        return _run_sync(self.aevaluate_subjective_answers_batch(items))
+
+    async def aevaluate_subjective_answers_batch(self, items: List[Dict]) -> List[Dict]:
+        """Evaluate several short/essay answers using as few Groq requests as possible.
+
+        Each item is a dict with 'question' (question dict) and 'candidate_answer' (str).
+        Answers are greedily packed into requests of at most EVALUATION_BATCH_TOKEN_BUDGET
+        estimated tokens; evaluations are returned in the same order as the items.
+        """
+        evaluations = [None] * len(items)
+        pending = []
+        first_pending = {}  # (question fingerprint, stripped answer) -> index of the answer sent to Groq
+        duplicates = []  # (index, index of the identical pending answer)
+
+        for index, item in enumerate(items):
+            if not item['candidate_answer'].strip():
+                evaluations[index] = {
+                    'marks_awarded': 0,
+                    'feedback': 'No answer provided.',
+                    'strengths': '',
+                    'improvements': 'Answer was not provided by the candidate.',
+                    'evaluation_details': 'Answer was not provided by the candidate.',
+                    'ai_evaluated': True,
+                    'needs_manual_review': False
+                }
+                continue
+
+            prescored = self._trivial_prescore(item['question'], item['candidate_answer'])
+            if prescored is not None:
+                evaluations[index] = prescored
+                continue
+
+            # Identical answers to the same question within this batch are evaluated once
+            pending_key = (_question_fingerprint(item['question']), item['candidate_answer'].strip())
+            first = first_pending.get(pending_key)
+            if first is not None:
+                duplicates.append((index, first))
+                continue
+
+            reused = self._answer_index.lookup(item['question'], item['candidate_answer'])
+            if reused is not None:
+                print(f"♻️ Reusing evaluation of a near-identical answer: {reused['marks_awarded']}/{item['question']['marks']} marks")
+                evaluations[index] = reused
+            else:
+                first_pending[pending_key] = index
+                pending.append(index)
+
+        chunks = self._pack_evaluation_chunks(items, pending)
+        sem = asyncio.Semaphore(GROQ_CONCURRENCY)
+        chunk_results = await asyncio.gather(*(
+            self._aevaluate_chunk(sem, [items[index] for index in chunk]) for chunk in chunks
+        ))
 
-        # Determine section context for better evaluation
-        section_context = self._get_section_context(question.get('section_type'))
+        for chunk, chunk_evaluations in zip(chunks, chunk_results):
+            for index, evaluation in zip(chunk, chunk_evaluations):
+                evaluations[index] = evaluation
+                if evaluation['ai_evaluated'] and not evaluation['needs_manual_review']:
+                    self._answer_index.add(items[index]['question'], items[index]['candidate_answer'], evaluation)
 
-        evaluation_prompt = f"""
-        You are an expert examiner evaluating a {question.get('section_type', 'technical')} question. {section_context}
+        if duplicates:
+            print(f"♻️ {len(duplicates)} duplicate answer(s) in this batch share an evaluation")
+            for index, first in duplicates:
+                evaluations[index] = dict(evaluations[first])
 
-        QUESTION: {question['question']}
-        QUESTION TYPE: {question['type']}
-        TOTAL MARKS: {question['marks']}
-        SECTION: {question.get('section_type', 'technical').upper()}
+        return evaluations
 
-        EXPECTED ANSWER: {question.get('expected_answer', 'Not provided')}
-        EVALUATION CRITERIA: {question.get('evaluation_criteria', 'Standard evaluation criteria')}
+    def _trivial_prescore(self, question: Dict, candidate_answer: str) -> Optional[Dict]:
+        """Score trivially inadequate answers with 0 marks without an LLM call.
+
+        Returns None when the answer needs a real evaluation.
+        """
+        answer = candidate_answer.strip()
+        normalized = answer.lower().rstrip('.!')
+
+        if _NOISE_ANSWER_RE.fullmatch(answer):
+            reason = 'The answer contains no meaningful content.'
+        elif normalized in _BOILERPLATE_ANSWERS:
+            reason = 'The candidate indicated they did not know the answer.'
+        elif len(answer.split()) < 3 and (question['type'] == 'essay' or question['marks'] >= 10):
+            # Only long-form questions - a one-word short answer (e.g. "42") can be fully correct
+            reason = 'The answer is far too brief for a long-form question.'
+        elif difflib.SequenceMatcher(None, question['question'].lower(), answer.lower()).ratio() > 0.9:
+            reason = 'The answer only restates the question.'
+        else:
+            return None
 
-        CANDIDATE'S ANSWER: {candidate_answer}
+        print(f"⚡ Pre-scored trivial answer without AI: {reason}")
+        return {
+            'marks_awarded': 0,
+            'feedback': f'{reason} No marks awarded.',
+            'strengths': '',
+            'improvements': 'Provide a complete answer that addresses the question.',
+            'evaluation_details': f'Rule-based pre-check: {reason}',
+            'ai_evaluated': True,
+            'needs_manual_review': False
+        }
 
-        Please evaluate this answer and provide:
-        1. Marks out of {question['marks']} (as a number)
+    def _pack_evaluation_chunks(self, items: List[Dict], indices: List[int]) -> List[List[int]]:
+        """Greedily group item indices into chunks that fit the per-request token budget"""
+        chunks = []
+        current = []
+        current_tokens = 0
+
+        for index in indices:
+            question = items[index]['question']
+            item_tokens = _estimate_tokens(
+                question['question'] + str(question.get('expected_answer', '')) + items[index]['candidate_answer']
+            ) + EVALUATION_COMPLETION_TOKENS
+
+            if current and current_tokens + item_tokens > EVALUATION_BATCH_TOKEN_BUDGET:
+                chunks.append(current)
+                current = []
+                current_tokens = 0
+
+            current.append(index)
+            current_tokens += item_tokens
+
+        if current:
+            chunks.append(current)
+        return chunks
+
+    def _create_evaluation_prompt(self, items: List[Dict]) -> str:
+        """Create a prompt asking for one evaluation per item, returned as a JSON object"""
+        answers = []
+        for number, item in enumerate(items, start=1):
+            question = item['question']
+            section_type = question.get('section_type', 'technical')
+            answers.append({
+                'answer_number': number,
+                'section': section_type.upper(),
+                'evaluation_focus': self._get_section_context(section_type),
+                'question': question['question'],
+                'question_type': question['type'],
+                'total_marks': question['marks'],
+                'expected_answer': question.get('expected_answer', 'Not provided'),
+                'evaluation_criteria': question.get('evaluation_criteria', 'Standard evaluation criteria'),
+                'candidate_answer': item['candidate_answer']
+            })
+
+        return f"""
+        You are an expert examiner. Evaluate each of the following {len(items)} candidate answers independently.
+
+        ANSWERS TO EVALUATE (JSON):
+        {orjson.dumps(answers, option=orjson.OPT_INDENT_2).decode()}
+
+        For each answer provide:
+        1. Marks out of its total_marks (as a number)
         2. Detailed feedback explaining the marks awarded
         3. Areas where the answer could be improved
 
-        Format your response as JSON:
+        Format your response as a JSON object with exactly {len(items)} evaluations, in the same order as the answers:
         {{
-            "marks_awarded": <number between 0 and {question['marks']}>,
-            "feedback": "Detailed feedback explaining the evaluation",
-            "strengths": "What the candidate did well",
-            "improvements": "Areas for improvement"
+            "evaluations": [
+                {{
+                    "answer_number": 1,
+                    "marks_awarded": <number between 0 and total_marks>,
+                    "feedback": "Detailed feedback explaining the evaluation",
+                    "strengths": "What the candidate did well",
+                    "improvements": "Areas for improvement"
+                }}
+            ]
         }}
 
         Be fair but thorough in your evaluation. Consider accuracy, completeness, clarity, and relevance.
         """
 
+    async def _aevaluate_chunk(self, sem: asyncio.Semaphore, items: List[Dict]) -> List[Dict]:
+        """Evaluate one packed chunk of answers with a single Groq request and API key failover"""
+        evaluation_prompt = self._create_evaluation_prompt(items)
+
         # Try evaluation with failover support
-        max_attempts = 2  # 2 attempts (primary + backup if needed)
-        failover_attempted = False
+        max_attempts = 3  # the other key or a delayed retry on quota errors, backoff on transient errors
 
         for attempt in range(max_attempts):
+            client_index = self._pick_client()
+            rate_limiter = self._rate_limiters[client_index]
             try:
-                key_info = "(backup key)" if self.using_backup else "(primary key)"
-                print(f"🤖 AI evaluating {question['type']} question (max marks: {question['marks']}) {key_info}...")
-
-                response = self.client.chat.completions.create(
-                    messages=[
-                        {
-                            "role": "user",
-                            "content": evaluation_prompt,
-                        }
-                    ],
-                    model=self.model_name,
-                    temperature=self.temperature,
-                )
+                print(f"🤖 AI evaluating {len(items)} answer(s) ({self._key_label(client_index)})...")
+
+                async with sem:
+                    reservation = await rate_limiter.acquire(
+                        _estimate_tokens(evaluation_prompt) + EVALUATION_COMPLETION_TOKENS * len(items)
+                    )
+                    response_text, usage = await asyncio.to_thread(
+                        self._complete, self._clients[client_index], evaluation_prompt,
+                        response_format={"type": "json_object"},
+                    )
+                if usage:
+                    self._record_usage(rate_limiter, reservation, usage)
 
                 # Clean and parse response
-                response_text = self._clean_json_response(response.choices[0].message.content)
-                evaluation = json.loads(response_text)
+                response_text = self._clean_json_response(response_text)
+                raw_evaluations = orjson.loads(response_text).get('evaluations', [])
+
+                # Match evaluations to answers by answer_number, not position - the model may
+                # reorder or skip entries. Numbers that appear twice are ambiguous and dropped.
+                by_number = {}
+                duplicate_numbers = set()
+                for raw in raw_evaluations if isinstance(raw_evaluations, list) else ():
+                    if not isinstance(raw, dict):
+                        continue
+                    number = _as_answer_number(raw.pop('answer_number', None))
+                    if number in by_number:
+                        duplicate_numbers.add(number)
+                    by_number[number] = raw
+
+                evaluations = []
+                for number, item in enumerate(items, start=1):
+                    question = item['question']
+                    evaluation = by_number.get(number) if number not in duplicate_numbers else None
+                    if evaluation is None:
+                        print(f"⚠️ AI response had no unambiguous evaluation for answer {number}")
+                        evaluations.append(_failed_evaluation(
+                            'AI evaluation failed (missing from response). This answer needs manual review by admin.',
+                            'Automatic evaluation failed. Please review manually.',
+                            'Evaluation missing or duplicated in batched AI response'
+                        ))
+                        continue
 
-                # Validate marks
-                marks_awarded = min(max(0, evaluation.get('marks_awarded', 0)), question['marks'])
-                evaluation['marks_awarded'] = marks_awarded
-                evaluation['ai_evaluated'] = True
-                evaluation['needs_manual_review'] = False
+                    # Validate marks
+                    marks_awarded = _as_marks(evaluation.get('marks_awarded'))
+                    if marks_awarded is None:
+                        print(f"⚠️ AI response had invalid marks for answer {number}: {evaluation.get('marks_awarded')!r}")
+                        evaluations.append(_failed_evaluation(
+                            'AI evaluation failed (invalid marks). This answer needs manual review by admin.',
+                            'Automatic evaluation failed. Please review manually.',
+                            'Batched AI response gave non-numeric marks_awarded'
+                        ))
+                        continue
 
-                print(f"✅ AI evaluation successful: {marks_awarded}/{question['marks']} marks")
+                    marks_awarded = min(max(0, marks_awarded), question['marks'])
+                    evaluation['marks_awarded'] = marks_awarded
+                    evaluation['ai_evaluated'] = True
+                    evaluation['needs_manual_review'] = False
+                    evaluations.append(evaluation)
 
-                return evaluation
+                    print(f"✅ AI evaluation successful: {marks_awarded}/{question['marks']} marks")
 
-            except json.JSONDecodeError as e:
-                print(f"❌ AI response JSON parsing error: {str(e)}")
-                print(f"   Raw response: {response_text[:200] if 'response_text' in locals() else 'No response'}...")
-                # JSON parsing errors are not quota errors, don't failover for these
-                return {
-                    'marks_awarded': 0,
-                    'feedback': 'AI evaluation failed (invalid response format). This answer needs manual review by admin.',
-                    'strengths': '',
-                    'improvements': 'Automatic evaluation failed due to parsing error.',
-                    'evaluation_details': f'JSON parsing error: {str(e)}',
-                    'ai_evaluated': False,
-                    'needs_manual_review': True
-                }
+                return evaluations
 
             except Exception as e:
                 print(f"❌ AI evaluation error: {str(e)}")
 
-                # Check if this is a quota error and we haven't tried failover yet
-                if self._is_quota_error(e) and not failover_attempted:
-                    print(f"🔴 Quota/rate limit error detected during evaluation")
-                    if self._switch_to_backup_key():
-                        failover_attempted = True
-                        print(f"🔄 Retrying evaluation with backup API key...")
-                        continue  # Retry with backup key
+                # On a quota error, retry with another key if one is available
+                if self._is_quota_error(e):
+                    self._cool_down(client_index, e)
+                    if self._has_available_client():
+                        print("🔄 Retrying evaluation with another API key...")
+                        continue
+
+                    # No other key available - wait as long as Groq asks and retry
+                    if attempt < max_attempts - 1:
+                        delay = _compute_backoff(attempt, _retry_after_seconds(e))
+                        print(f"⏳ Waiting {delay:.1f}s before retrying evaluation...")
+                        await asyncio.sleep(delay)
+                        continue
+
+                # 5xx, timeouts and dropped connections usually succeed on a retry
+                if isinstance(e, _TRANSIENT_ERRORS) and attempt < max_attempts - 1:
+                    delay = _compute_backoff(attempt)
+                    print(f"⏳ Transient Groq error - retrying evaluation in {delay:.1f}s...")
+                    await asyncio.sleep(delay)
+                    continue
 
                 # Fallback - needs manual review, award 0 marks until reviewed
-                return {
-                    'marks_awarded': 0,
-                    'feedback': 'AI evaluation failed. This answer needs manual review by admin.',
-                    'strengths': '',
-                    'improvements': 'Automatic evaluation failed. Please review manually.',
-                    'evaluation_details': f'Error: {str(e)}',
-                    'ai_evaluated': False,
-                    'needs_manual_review': True
-                }
+                return [_failed_evaluation(
+                    'AI evaluation failed. This answer needs manual review by admin.',
+                    'Automatic evaluation failed. Please review manually.',
+                    f'Error: {str(e)}'
+                ) for _ in items]
 
         # Should not reach here, but just in case
-        return {
-            'marks_awarded': 0,
-            'feedback': 'AI evaluation failed after all attempts. This answer needs manual review by admin.',
-            'strengths': '',
-            'improvements': 'Automatic evaluation failed after exhausting all API keys.',
-            'evaluation_details': 'All API key attempts exhausted',
-            'ai_evaluated': False,
-            'needs_manual_review': True
-        }
+        return [_failed_evaluation(
+            'AI evaluation failed after all attempts. This answer needs manual review by admin.',
+            'Automatic evaluation failed after exhausting all API keys.',
+            'All API key attempts exhausted'
+        ) for _ in items]
+
+    def _record_usage(self, rate_limiter: TokenBucket, reservation: list, usage):
+        """Settle a rate-limit reservation with Groq's billed usage and log prompt cache hits"""
+        details = getattr(usage, 'prompt_tokens_details', None)
+        cached_tokens = getattr(details, 'cached_tokens', None) or 0
+        prompt_tokens = getattr(usage, 'prompt_tokens', None) or 0
+        rate_limiter.record(reservation, usage.total_tokens, prompt_tokens, cached_tokens)
+        if cached_tokens:
+            print(f"💾 Groq prompt cache: {cached_tokens}/{prompt_tokens} prompt tokens cached "
+                  f"({rate_limiter.cache_hit_rate():.1f}% overall on this key)")
+
+    def _complete(self, client: Groq, prompt: str, **kwargs):
+        """Run a chat completion and return (response_text, usage).
+
+        A single non-streaming call: every request uses response_format (JSON mode), which
+        Groq does not support together with streaming. Blocking - call through asyncio.to_thread.
+        """
+        response = client.chat.completions.create(
+            messages=[
+                {
+                    "role": "user",
+                    "content": prompt,
+                }
+            ],
+            model=self.model_name,
+            temperature=self.temperature,
+            **kwargs
+        )
+        return response.choices[0].message.content or '', response.usage
 
     def _clean_json_response(self, response_text: str) -> str:
-        """Clean and fix common JSON formatting issues"""
-        # Remove markdown code blocks
-        if response_text.startswith('```json'):
-            response_text = response_text[7:]
-        if response_text.startswith('```'):
-            response_text = response_text[3:]
-        if response_text.endswith('```'):
-            response_text = response_text[:-3]
-        
-        # Strip whitespace
-        response_text = response_text.strip()
-        
-        # Fix trailing commas in arrays and objects
-        response_text = re.sub(r',(\s*[}\]])', r'\1', response_text)
-        
-        # Fix any double commas
-        response_text = re.sub(r',,+', r',', response_text)
-        
-        # Ensure proper JSON structure starts with [ and ends with ] OR starts with { and ends with } (for objects)
-        # Note: Previous implementation might have been tailored for array only response for questions, 
-        # but evaluation returns object.
-        
-        # Try to find start/end of JSON structure if potential garbage around it
-        if not (response_text.startswith('[') or response_text.startswith('{')):
-            start_arr = response_text.find('[')
-            start_obj = response_text.find('{')
-            
-            if start_arr != -1 and (start_obj == -1 or start_arr < start_obj):
-                response_text = response_text[start_arr:]
-            elif start_obj != -1:
-                response_text = response_text[start_obj:]
-        
-        if not (response_text.endswith(']') or response_text.endswith('}')):
-            end_arr = response_text.rfind(']')
-            end_obj = response_text.rfind('}')
-            
-            if end_arr != -1 and (end_obj == -1 or end_arr > end_obj):
-                response_text = response_text[:end_arr + 1]
-            elif end_obj != -1:
-                response_text = response_text[:end_obj + 1]
-        
-        return response_text
+        """Normalize a model response before parsing.
+
+        Requests use response_format json_object, so Groq constrains decoding to valid
+        JSON server-side and no markdown/trailing-comma repairs are needed.
+        """
+        return response_text.strip()
 
     def _create_section_prompt(self, department: str, position: str, section_type: str,
                               mcq_count: int, multi_select_count: int, short_count: int, essay_count: int,
@@ -464,398 +1512,82 @@ class GroqAnalyzer:
                               custom_instructions: str = '',
                               mcq_options_count: int = 4) -> str:
         """Create appropriate prompt based on section type with language specification, difficulty level, multi-select MCQ support, custom instructions, and variable options count"""
-
-        # Determine the target language for questions
-        if section_type == 'bengali':
-            target_language = 'bengali'
-            language_instruction = """
-            📤 CRITICAL LANGUAGE REQUIREMENT: ALL questions, options, and explanations MUST be written in BENGALI language.
-            Use proper Bengali script (বাংলা) for all content in this section.
-            """
-        elif section_type == 'english':
-            target_language = 'english'
-            language_instruction = """
-            📤 CRITICAL LANGUAGE REQUIREMENT: ALL questions, options, and explanations MUST be written in ENGLISH language.
-            This section tests English language proficiency, so use proper English for all content.
-            """
-        else:
-            target_language = exam_language
-            if exam_language == 'bengali':
-                language_instruction = """
-                📤 CRITICAL LANGUAGE REQUIREMENT: ALL questions, options, and explanations MUST be written in BENGALI language.
-                Use proper Bengali script (বাংলা) for all content. This is a Bengali language exam.
-                """
-            else:
-                language_instruction = """
-                📤 CRITICAL LANGUAGE REQUIREMENT: ALL questions, options, and explanations MUST be written in ENGLISH language.
-                Use proper English for all content. This is an English language exam.
-                """
-
-        # Get section description (pass section_config for custom sections)
-        section_description = self._get_section_description(section_type, department, position, section_config)
-
-        # For custom sections, use display_name in the prompt
-        display_section_name = section_type.upper()
-        if section_config and section_config.get('is_custom'):
-            display_section_name = section_config.get('display_name', 'Custom Section').upper()
-
-        # Difficulty level instruction
-        difficulty_instructions = {
-            'easy': """
-            🟢 DIFFICULTY LEVEL: EASY
-            - Questions should test basic knowledge and fundamental concepts
-            - Use straightforward language and clear scenarios
-            - MCQ options should be clearly distinguishable
-            - Focus on recall and basic understanding
-            - Suitable for entry-level candidates or freshers
-            """,
-            'medium': """
-            🟡 DIFFICULTY LEVEL: MEDIUM
-            - Questions should test intermediate understanding and application
-            - Include scenarios that require applying knowledge to solve problems
-            - MCQ options should require careful thinking to differentiate
-            - Balance between knowledge recall and practical application
-            - Suitable for candidates with 1-3 years of experience
-            """,
-            'hard': """
-            🔴 DIFFICULTY LEVEL: HARD
-            - Questions should test advanced concepts and deep understanding
-            - Include complex scenarios requiring analysis and critical thinking
-            - MCQ options should be challenging with subtle differences
-            - Focus on problem-solving, analysis, and evaluation
-            - Include edge cases and real-world complex scenarios
-            - Suitable for senior/experienced candidates
-            """,
-            'mixed': """
-            🎯 DIFFICULTY LEVEL: MIXED (Progressive)
-            - Include a mix of easy, medium, and hard questions
-            - Start with easier questions and progressively increase difficulty
-            - Distribution: approximately 30% easy, 40% medium, 30% hard
-            - This provides a comprehensive assessment across all competency levels
-            """
+        build = self._make_prompt_builder(department, position, exam_language, difficulty_level, custom_instructions, mcq_options_count)
+        return build(section_type, section_config, mcq_count, multi_select_count, short_count, essay_count,
+                     mcq_marks, short_marks, essay_marks, syllabus)
+
+    def _make_prompt_builder(self, department: str, position: str, exam_language: str = 'english',
+                             difficulty_level: str = 'medium', custom_instructions: str = '',
+                             mcq_options_count: int = 4) -> Callable[..., str]:
+        """Return a section prompt builder with the exam-wide fields bound once.
+
+        Department, position, language, difficulty, admin instructions and the MCQ options
+        count are the same for every section of an exam, so they are resolved here and the
+        returned build() only fills in the per-section fields.
+        """
+        exam_fields = {
+            'department': department,
+            'position': position,
+            'difficulty_instruction': _DIFFICULTY_INSTRUCTIONS.get(difficulty_level, _DIFFICULTY_INSTRUCTIONS['medium']),
+            'custom_instructions': (custom_instructions or '').strip(),
+            'mcq_options_count': mcq_options_count,
         }
-        difficulty_instruction = difficulty_instructions.get(difficulty_level, difficulty_instructions['medium'])
-
-        # Custom instructions from admin
-        admin_instructions = ""
-        if custom_instructions and custom_instructions.strip():
-            admin_instructions = f"""
-
-            📋 ADMIN'S CUSTOM INSTRUCTIONS (IMPORTANT):
-            {custom_instructions.strip()}
-
-            ⚠️ Please follow these custom instructions provided by the exam administrator when generating questions.
-            """
-
-        # Enhanced custom syllabus handling
-        syllabus_instruction = ""
-        if syllabus.strip():
-            syllabus_instruction = f"""
-
-            🎯 CUSTOM SYLLABUS/REQUIREMENTS (HIGHEST PRIORITY):
-            {syllabus.strip()}
-
-            ⚠️ CRITICAL INSTRUCTION: All questions MUST be based primarily on the custom syllabus above.
-            The syllabus topics take HIGHEST PRIORITY over general section descriptions.
-            Focus specifically on the topics, technologies, and requirements mentioned in the custom syllabus.
-            Ensure every question directly relates to the specified syllabus content.
-            """
-
-        # Build multi-select instruction if needed
-        multi_select_instruction = ""
-        min_correct_for_multi = min(3, mcq_options_count - 1)  # At least 2 correct, max 3 or options-1
-        if multi_select_count > 0:
-            multi_select_instruction = f"""
-        - {multi_select_count} Multi-Select MCQ (questions with multiple correct answers) - {mcq_marks} marks each
-          ⚠️ For multi-select MCQs: Set "is_multi_select": true and provide "correct_answers" as an array of indices (e.g., [0, 2])
-          Multi-select questions should have 2-{min_correct_for_multi} correct options out of {mcq_options_count}."""
-
-        # Generate dynamic option letters and example options based on mcq_options_count
-        option_letters = ['A', 'B', 'C', 'D', 'E', 'F'][:mcq_options_count]
-        example_options = ', '.join([f'\"Option {letter}\"' for letter in option_letters])
-        valid_indices = ', '.join([str(i) for i in range(mcq_options_count)])
-        example_correct_indices = [0, min(2, mcq_options_count - 1)]  # First and third (or last) option
-
-        prompt = f"""
-        Create an exam section for {display_section_name} SKILLS for the position of {position} in the {department} department.
-
-        {language_instruction}
-
-        {difficulty_instruction}
-        {admin_instructions}
-
-        Generate exactly:
-        - {mcq_count} Single-Answer MCQ (Multiple Choice Questions with ONE correct answer) - {mcq_marks} marks each{multi_select_instruction}
-        - {short_count} Short Answer Questions - {short_marks} marks each
-        - {essay_count} Essay/Long Answer Questions - {essay_marks} marks each
-
-        {section_description}
-        {syllabus_instruction}
-
-        🔥 CRITICAL JSON FORMAT REQUIREMENTS:
-        1. Return ONLY a valid JSON array, nothing else
-        2. NO trailing commas in arrays or objects
-        3. ALL strings must be properly escaped
-        4. Use the EXACT structure shown below
-        5. Keep content concise but meaningful
-        6. For essay questions, keep expected_answer under 500 words
-        7. Mix single-answer and multi-select MCQs randomly (do NOT group them together)
-
-        🔢 MCQ OPTIONS REQUIREMENT:
-        Each MCQ question MUST have exactly {mcq_options_count} options (labeled {', '.join(option_letters)}).
-
-        Format your response as a JSON array with this exact structure:
-        [
-            {{
-                "type": "mcq",
-                "question": "Single-answer question text here",
-                "options": [{example_options}],
-                "correct_answer": 0,
-                "is_multi_select": false,
-                "marks": {mcq_marks},
-                "explanation": "Brief explanation of why this is correct"
-            }},
-            {{
-                "type": "mcq",
-                "question": "Multi-select question text here (select all that apply)",
-                "options": [{example_options}],
-                "correct_answers": {example_correct_indices},
-                "is_multi_select": true,
-                "marks": {mcq_marks},
-                "explanation": "Brief explanation of why these options are correct"
-            }},
-            {{
-                "type": "short",
-                "question": "Short answer question text here",
-                "marks": {short_marks},
-                "expected_answer": "Expected answer or key points",
-                "evaluation_criteria": "Criteria for evaluating the answer"
-            }},
-            {{
-                "type": "essay",
-                "question": "Essay question text here",
-                "marks": {essay_marks},
-                "expected_answer": "Expected answer structure and key points (keep under 500 words)",
-                "evaluation_criteria": "Detailed criteria for evaluating the essay"
-            }}
-        ]
-
-        IMPORTANT REQUIREMENTS:
-        - ALL content must be in {target_language.upper()} language as specified above
-        - Each MCQ MUST have exactly {mcq_options_count} options
-        - For SINGLE-ANSWER MCQs: Set "is_multi_select": false and "correct_answer" as index ({valid_indices})
-        - For MULTI-SELECT MCQs: Set "is_multi_select": true and "correct_answers" as array of indices (e.g., {example_correct_indices})
-        - Multi-select questions should clearly indicate "(select all that apply)" or similar in the question text
-        - Mix single-answer and multi-select MCQs randomly throughout the questions
-        - For short and essay questions, provide clear evaluation criteria
-        - Questions should test different competency levels (knowledge, application, analysis)
-        - Ensure cultural sensitivity and professional appropriateness
-        - NO trailing commas anywhere in the JSON
-        - Keep essay expected_answer concise (under 500 words)
-        {"- Every question must directly relate to the specified syllabus content" if syllabus.strip() else ""}
-
-        🔥 CRITICAL:
-        1. The language requirement is NON-NEGOTIABLE. Use {target_language.upper()} language for ALL content.
-        2. Return only valid JSON - no markdown, no extra text, no code blocks.
-        3. Ensure no trailing commas in any arrays or objects.
-        4. Generate exactly {mcq_count} single-answer MCQs and {multi_select_count} multi-select MCQs.
-        5. Each MCQ MUST have exactly {mcq_options_count} options - no more, no less.
+        exam_language_instruction = _LANGUAGE_INSTRUCTION_BN if exam_language == 'bengali' else _LANGUAGE_INSTRUCTION_EN
+        render_body = _SECTION_PROMPT_BODY_TEMPLATE.render
+        get_description = self._get_section_description
+
+        def build(section_type: str, section_config: Optional[Dict],
+                  mcq_count: int, multi_select_count: int, short_count: int, essay_count: int,
+                  mcq_marks: int, short_marks: int, essay_marks: int, syllabus: str = "") -> str:
+            # Language sections are always written in their own language
+            if section_type == 'bengali':
+                target_language, language_instruction = 'bengali', _LANGUAGE_INSTRUCTION_BN_SECTION
+            elif section_type == 'english':
+                target_language, language_instruction = 'english', _LANGUAGE_INSTRUCTION_EN_SECTION
+            else:
+                target_language, language_instruction = exam_language, exam_language_instruction
+
+            # For custom sections, use display_name in the prompt
+            display_section_name = section_type.upper()
+            if section_config and section_config.get('is_custom'):
+                display_section_name = section_config.get('display_name', 'Custom Section').upper()
+
+            return ''.join((
+                _section_prompt_prefix(mcq_options_count),
+                render_body(
+                    exam_fields,
+                    display_section_name=display_section_name,
+                    target_language=target_language,
+                    language_instruction=language_instruction,
+                    section_description=get_description(section_type, department, position, section_config),
+                    syllabus=syllabus.strip(),
+                    mcq_count=mcq_count,
+                    multi_select_count=multi_select_count,
+                    short_count=short_count,
+                    essay_count=essay_count,
+                    mcq_marks=mcq_marks,
+                    short_marks=short_marks,
+                    essay_marks=essay_marks,
+                )
+            ))
 
-        Return only the JSON array, no additional text or formatting.
-        """
-        
-        return prompt
+        return build
 
     def _get_section_description(self, section_type: str, department: str, position: str, section_config: Dict = None) -> str:
         """Get section description based on type, with support for custom sections"""
-        descriptions = {
-            'technical': f"""
-            Technical skills and knowledge specific to {position} in {department}:
-            - Programming concepts, algorithms, and data structures
-            - System design and architecture
-            - Industry best practices and methodologies
-            - Tools and technologies used in {department}
-            - Problem-solving scenarios relevant to {position}
-            - Current trends and challenges in {department}
-            """,
-            'english': """
-            English Language Proficiency:
-            - Grammar and sentence structure
-            - Vocabulary and word usage
-            - Reading comprehension
-            - Writing skills and communication
-            - Business English and professional communication
-            - Spelling and punctuation
-            """,
-            'mathematics': """
-            Mathematics and Quantitative Skills:
-            - Basic arithmetic and algebra
-            - Statistics and probability
-            - Logical reasoning and problem solving
-            - Data interpretation and analysis
-            - Mathematical concepts relevant to the workplace
-            - Numerical reasoning
-            """,
-            'bengali': """
-            Bengali Language Skills:
-            - Grammar and sentence construction (ব্যাকরণ এবং বাক্য গঠন)
-            - Vocabulary and comprehension (শব্দভাণ্ডার এবং বোধগম্যতা)
-            - Bengali literature basics (বাংলা সাহিত্যের মূল বিষয়)
-            - Translation skills (অনুবাদ দক্ষতা)
-            - Professional Bengali communication (পেশাদার বাংলা যোগাযোগ)
-            - Cultural and linguistic knowledge (সাংস্কৃতিক ও ভাষাগত জ্ঞান)
-            """,
-            'general_knowledge': """
-            General Knowledge and Current Affairs:
-            - Current events and news (local and international)
-            - History, geography, and culture
-            - Science and technology awareness
-            - Sports and entertainment
-            - Government and politics
-            - Business and economics basics
-            """,
-            'logical_reasoning': """
-            Logical Reasoning and Intelligence:
-            - Pattern recognition and sequences
-            - Analytical thinking and problem solving
-            - Critical thinking skills
-            - Decision making scenarios
-            - Abstract reasoning
-            """
-        }
-
         # Check if this is a custom section
         if section_config and section_config.get('is_custom'):
-            display_name = section_config.get('display_name', 'Custom Section')
-            return f"""
-            Custom Section: {display_name}
-            This is a custom section for {position} in {department}.
-            Generate questions based on the syllabus/requirements provided.
-            Focus on practical knowledge and professional skills relevant to this custom topic.
-            """
-
-        return descriptions.get(section_type, f"""
-        Professional Skills for {position}:
-        - Industry knowledge and best practices
-        - Professional ethics and communication
-        - Problem-solving and analytical thinking
-        - Leadership and teamwork skills
-        - Project management basics
-        - Relevant subject matter expertise
-        """)
+            return _section_description(section_type, department, position, section_config.get('display_name', 'Custom Section'))
+        return _section_description(section_type, department, position)
 
     def _get_section_context(self, section_type: str) -> str:
         """Get evaluation context for different sections"""
-        contexts = {
-            'english': "Focus on grammar, vocabulary, communication skills, and language proficiency.",
-            'mathematics': "Focus on mathematical accuracy, problem-solving approach, and correct calculations.",
-            'bengali': "Focus on Bengali language skills, grammar, and cultural understanding.",
-            'general_knowledge': "Focus on factual accuracy and breadth of knowledge.",
-            'logical_reasoning': "Focus on logical thinking, problem-solving approach, and reasoning skills."
-        }
-
         # For custom sections (starting with 'custom_'), use generic professional context
-        if section_type.startswith('custom_'):
-            return "Focus on accuracy, completeness, and professional knowledge relevant to this custom section."
+        if section_type[:7] == 'custom_':
+            return _CUSTOM_SECTION_CONTEXT
 
-        return contexts.get(section_type, "Focus on technical accuracy and professional knowledge.")
-
-    def _validate_questions_structure(self, questions: List[Dict], section_config: Dict) -> bool:
-        """Validate that the questions have the correct structure including multi-select MCQs"""
-        try:
-            if not isinstance(questions, list):
-                print(f"❌ Questions is not a list: {type(questions)}")
-                return False
-
-            # Count different question types
-            all_mcqs = [q for q in questions if q.get('type') == 'mcq']
-            single_select_mcqs = [q for q in all_mcqs if not q.get('is_multi_select', False)]
-            multi_select_mcqs = [q for q in all_mcqs if q.get('is_multi_select', False)]
-            short_count = len([q for q in questions if q.get('type') == 'short'])
-            essay_count = len([q for q in questions if q.get('type') == 'essay'])
-
-            expected_single_mcq = section_config.get('mcq_count', 0)
-            expected_multi_mcq = section_config.get('multi_select_count', 0)
-            expected_short = section_config.get('short_count', 0)
-            expected_essay = section_config.get('essay_count', 0)
-
-            # Check total count matches
-            total_expected = expected_single_mcq + expected_multi_mcq + expected_short + expected_essay
-            if len(questions) != total_expected:
-                print(f"❌ Total question count mismatch: Expected {total_expected}, Got {len(questions)}")
-                return False
+        return _SECTION_CONTEXTS.get(section_type, _DEFAULT_SECTION_CONTEXT)
 
-            # More flexible count validation - allow slight variations
-            # Total MCQ count should match (single + multi)
-            total_mcq_expected = expected_single_mcq + expected_multi_mcq
-            total_mcq_got = len(all_mcqs)
-            mcq_diff = abs(total_mcq_got - total_mcq_expected)
-            short_diff = abs(short_count - expected_short)
-            essay_diff = abs(essay_count - expected_essay)
-
-            if mcq_diff > 1 or short_diff > 1 or essay_diff > 1:
-                print(f"❌ Count mismatch: Expected MCQ:{total_mcq_expected} (single:{expected_single_mcq}, multi:{expected_multi_mcq}), Short:{expected_short}, Essay:{expected_essay}")
-                print(f"❌ Got MCQ:{total_mcq_got} (single:{len(single_select_mcqs)}, multi:{len(multi_select_mcqs)}), Short:{short_count}, Essay:{essay_count}")
-                return False
-
-            # Validate each question structure
-            for i, q in enumerate(questions):
-                if not isinstance(q, dict):
-                    print(f"❌ Question {i} is not a dict: {type(q)}")
-                    return False
-
-                required_keys = ['type', 'question', 'marks']
-                if not all(key in q for key in required_keys):
-                    print(f"❌ Missing required keys in question {i}: {q.keys()}")
-                    return False
-
-                if q['type'] == 'mcq':
-                    if 'options' not in q:
-                        print(f"❌ MCQ missing options: {q.keys()}")
-                        return False
-
-                    # Get expected options count from instance variable (2-6 range)
-                    expected_options_count = getattr(self, '_mcq_options_count', 4)
-                    valid_indices = list(range(expected_options_count))
-
-                    # Allow options count within valid range (2-6) and matching expected count
-                    options_count = len(q['options']) if isinstance(q['options'], list) else 0
-                    if not isinstance(q['options'], list) or options_count < 2 or options_count > 6:
-                        print(f"❌ MCQ options invalid (must be 2-6 options): {q.get('options', 'missing')}")
-                        return False
-
-                    # Check for multi-select vs single-select MCQ
-                    is_multi = q.get('is_multi_select', False)
-                    actual_valid_indices = list(range(options_count))  # Use actual options count for validation
-
-                    if is_multi:
-                        # Multi-select MCQ: should have correct_answers as array
-                        if 'correct_answers' not in q:
-                            print(f"❌ Multi-select MCQ missing correct_answers: {q.keys()}")
-                            return False
-                        if not isinstance(q['correct_answers'], list) or len(q['correct_answers']) < 2:
-                            print(f"❌ Multi-select MCQ should have at least 2 correct answers: {q.get('correct_answers', 'missing')}")
-                            return False
-                        for ans in q['correct_answers']:
-                            if not isinstance(ans, int) or ans not in actual_valid_indices:
-                                print(f"❌ Multi-select MCQ correct_answers contains invalid index: {ans} (valid: {actual_valid_indices})")
-                                return False
-                    else:
-                        # Single-select MCQ: should have correct_answer as int
-                        if 'correct_answer' not in q:
-                            print(f"❌ Single-select MCQ missing correct_answer: {q.keys()}")
-                            return False
-                        if not isinstance(q['correct_answer'], int) or q['correct_answer'] not in actual_valid_indices:
-                            print(f"❌ MCQ correct_answer invalid: {q.get('correct_answer', 'missing')} (valid: {actual_valid_indices})")
-                            return False
-
-                elif q['type'] in ['short', 'essay']:
-                    if 'expected_answer' not in q:
-                        print(f"❌ {q['type']} missing expected_answer")
-                        return False
-
-            return True
-            
-        except Exception as e:
-            print(f"❌ Validation error: {str(e)}")
-            return False
+    def _check_questions_structure(self, questions: List[Dict], section_config: Dict) -> VReason:
+        """Validate generated questions, returning VReason.OK or the first failure found"""
+        return _validate_one(questions, section_config)
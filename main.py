@@ -9,8 +9,60 @@ import os
 import signal
 import sys
 import atexit
+import importlib.util
+from dataclasses import asdict, dataclass
 from dotenv import load_dotenv
 
+# Startup banner, written in one call ({host}, {port} and {reload} are filled in by main)
+_BANNER = (
+    "=" * 60 + "\n"
+    "🎓 AI-based Exam System with Background Evaluation\n"
+    + "=" * 60 + "\n"
+    "🌐 Server: http://{host}:{port}\n"
+    "👤 Admin panel: http://{host}:{port}/admin\n"
+    "❤️  Health check: http://{host}:{port}/health\n"
+    "🔄 Reload mode: {reload}\n"
+    + "=" * 60 + "\n"
+    "\n"
+    "📋 Background Evaluation Queue Features:\n"
+    "   • Rate limiting: 10 API calls/minute (prevents quota exhaustion)\n"
+    "   • Automatic retries with exponential backoff\n"
+    "   • Candidates can leave after submission - answers are safe!\n"
+    "   • Results available when evaluation completes\n"
+    + "=" * 60 + "\n"
+    "\n"
+)
+
+
+@dataclass(frozen=True, slots=True)
+class ServerConfig:
+    """Server settings read once from the environment; fields map directly onto uvicorn.run() kwargs"""
+    host: str
+    port: int
+    reload: bool
+    log_level: str
+    loop: str
+    http: str
+    workers: int
+
+    @classmethod
+    def from_env(cls) -> "ServerConfig":
+        reload = os.getenv("RELOAD", "true").lower() == "true"
+        # Production (no reload) uses uvloop and the httptools parser, both shipped with
+        # uvicorn[standard]; uvloop is not available on Windows, so fall back to asyncio there
+        production = not reload
+        return cls(
+            host=os.getenv("HOST", "0.0.0.0"),
+            port=int(os.getenv("PORT", "8000")),
+            reload=reload,
+            log_level=os.getenv("LOG_LEVEL", "info"),
+            loop="uvloop" if production and importlib.util.find_spec("uvloop") else "auto",
+            http="httptools" if production and importlib.util.find_spec("httptools") else "auto",
+            # Admin sessions and the evaluation queue live in process memory, so more than one
+            # worker is only safe once that state is shared; opt in explicitly with WORKERS
+            workers=int(os.getenv("WORKERS", "1")) if production else 1
+        )
+
 
 def start_evaluation_worker():
     """Start the background evaluation worker"""
@@ -47,40 +99,17 @@ def main():
         return
 
     # Get server configuration from environment variables with defaults
-    host = os.getenv("HOST", "0.0.0.0")
-    port = int(os.getenv("PORT", "8000"))
-    reload = os.getenv("RELOAD", "true").lower() == "true"
-    log_level = os.getenv("LOG_LEVEL", "info")
-
-    print("=" * 60)
-    print("🎓 AI-based Exam System with Background Evaluation")
-    print("=" * 60)
-    print(f"🌐 Server: http://{host}:{port}")
-    print(f"👤 Admin panel: http://{host}:{port}/admin")
-    print(f"❤️  Health check: http://{host}:{port}/health")
-    print(f"🔄 Reload mode: {reload}")
-    print("=" * 60)
-    print("")
-    print("📋 Background Evaluation Queue Features:")
-    print("   • Rate limiting: 10 API calls/minute (prevents quota exhaustion)")
-    print("   • Automatic retries with exponential backoff")
-    print("   • Candidates can leave after submission - answers are safe!")
-    print("   • Results available when evaluation completes")
-    print("=" * 60)
-    print("")
+    config = ServerConfig.from_env()
+
+    sys.stdout.write(_BANNER.format(host=config.host, port=config.port, reload=config.reload))
+    sys.stdout.flush()
 
     # Note: When using reload=True, the worker is started inside the app
     # When reload=False, we could start it here, but app.py handles it
-    if not reload:
-        print("💡 Starting in production mode (no auto-reload)")
-
-    uvicorn.run(
-        "app:app",
-        host=host,
-        port=port,
-        reload=reload,
-        log_level=log_level
-    )
+    if not config.reload:
+        print(f"💡 Starting in production mode (no auto-reload, loop={config.loop}, http={config.http}, workers={config.workers})")
+
+    uvicorn.run("app:app", **asdict(config))
 
 
 if __name__ == "__main__":
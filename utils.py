@@ -2,18 +2,37 @@
 Utility classes and functions for the AI-based Exam System
 """
 
+import bisect
+import hashlib
+import re
 import secrets
+import time
+import orjson
 import pytz
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, NamedTuple, Optional
 from pydantic import BaseModel
 
-from groq_analyzer import GroqAnalyzer
+from groq_analyzer import GroqAnalyzer, _question_fingerprint, _run_sync
 
 
 # Bangladesh timezone
 BANGLADESH_TZ = pytz.timezone('Asia/Dhaka')
 
+# Performance level ladder: percentages below 50 are Poor, 50+ Average, 70+ Good, 85+ Excellent
+_LEVEL_THRESHOLDS = (50, 70, 85)
+_LEVELS = ("Poor", "Average", "Good", "Excellent")
+_LEVEL_FEEDBACK = (
+    "Below average performance. Significant improvement needed in your preparation.",
+    "Average performance. You have basic understanding but need to strengthen your knowledge.",
+    "Good performance overall. You have shown solid understanding with room for improvement.",
+    "Excellent performance! You have demonstrated strong knowledge and understanding.",
+)
+
+# SQLite CURRENT_TIMESTAMP format ('YYYY-MM-DD HH:MM:SS')
+_UTC_TIMESTAMP_RE = re.compile(r'\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}')
+
 
 class ExamSession(BaseModel):
     session_id: str
@@ -27,23 +46,52 @@ class ExamSession(BaseModel):
 class AdminSession(BaseModel):
     session_id: str
     created_at: datetime
-    expires_at: datetime
+    expires_at: datetime  # wall-clock expiry at login, for display
+    expires_at_monotonic: float  # time.monotonic() deadline used by verify_admin_session
+
+
+def _evaluation_cache_key(question: Dict, candidate_answer: str) -> str:
+    """Key for the persistent evaluation cache: question id, the question's grading content
+    (text, marks, expected answer, criteria) and the whitespace-collapsed answer. Case is kept:
+    this is an exact-match cache and "CO" and "Co" are different answers"""
+    normalized = ' '.join(candidate_answer.split())
+    return hashlib.sha256(
+        f"{question['id']}|{_question_fingerprint(question)}|{normalized}".encode('utf-8')
+    ).hexdigest()
 
 
 class ExamSystem:
-    def __init__(self, api_key: str, backup_api_key: str = None):
-        """Initialize the exam system with AI analyzer and optional backup key for failover"""
+    def __init__(self, api_key: str, backup_api_key: str = None, db=None):
+        """Initialize the exam system with AI analyzer and optional backup key for failover.
+
+        When a database is given, successful AI evaluations are cached in it and reused for
+        identical answers to the same question (across candidates and restarts).
+        """
         self.analyzer = GroqAnalyzer(api_key, backup_api_key)
+        self.db = db
+        self.evaluation_cache_lookups = 0
+        self.evaluation_cache_hits = 0
 
     def generate_exam_questions_by_sections(self, department: str, position: str, sections_structure: Dict, exam_language: str = 'english', difficulty_level: str = 'medium', custom_instructions: str = '', mcq_options_count: int = 4) -> Dict:
+        """Synchronous entrypoint for agenerate_exam_questions_by_sections"""
+        return _run_sync(self.agenerate_exam_questions_by_sections(
+            department, position, sections_structure, exam_language,
+            difficulty_level=difficulty_level,
+            custom_instructions=custom_instructions,
+            mcq_options_count=mcq_options_count
+        ))
+
+    async def agenerate_exam_questions_by_sections(self, department: str, position: str, sections_structure: Dict, exam_language: str = 'english', difficulty_level: str = 'medium', custom_instructions: str = '', mcq_options_count: int = 4) -> Dict:
         """Generate exam questions organized by sections with language support and AI instructions.
 
+        Sections are generated concurrently, so the exam takes about as long as its slowest section.
+
         Returns a dict with:
         - 'questions': Dict of section_type -> list of questions (for successful sections)
         - 'failed_sections': List of section names that failed to generate
         - 'success': Boolean indicating if all sections generated successfully
         """
-        return self.analyzer.generate_questions_by_sections(
+        return await self.analyzer.agenerate_questions_by_sections(
             department, position, sections_structure, exam_language,
             difficulty_level=difficulty_level,
             custom_instructions=custom_instructions,
@@ -51,6 +99,14 @@ class ExamSystem:
         )
 
     def regenerate_section_questions(self, department: str, position: str, section_type: str, section_config: Dict, exam_language: str = 'english', difficulty_level: str = 'medium', custom_instructions: str = '') -> Dict:
+        """Synchronous entrypoint for aregenerate_section_questions"""
+        return _run_sync(self.aregenerate_section_questions(
+            department, position, section_type, section_config, exam_language,
+            difficulty_level=difficulty_level,
+            custom_instructions=custom_instructions
+        ))
+
+    async def aregenerate_section_questions(self, department: str, position: str, section_type: str, section_config: Dict, exam_language: str = 'english', difficulty_level: str = 'medium', custom_instructions: str = '') -> Dict:
         """Regenerate questions for a single section.
 
         Returns a dict with:
@@ -58,35 +114,50 @@ class ExamSystem:
         - 'success': Boolean indicating if generation was successful
         - 'error': Error message if failed
         """
-        return self.analyzer.generate_single_section(
+        return await self.analyzer.agenerate_single_section(
             department, position, section_type, section_config, exam_language,
             difficulty_level=difficulty_level,
             custom_instructions=custom_instructions
         )
 
     def evaluate_exam(self, questions: List[Dict], candidate_answers: Dict, negative_marking_config: Dict = None, multi_select_scoring_mode: str = 'partial') -> Dict:
-        """Evaluate candidate answers and return detailed results with negative marking support"""
-        total_marks = 0
-        obtained_marks = 0
-        negative_marks = 0
-        question_results = []
+        """Synchronous entrypoint for aevaluate_exam (used by the background evaluation worker)"""
+        return _run_sync(self.aevaluate_exam(questions, candidate_answers, negative_marking_config, multi_select_scoring_mode))
+
+    async def aevaluate_exam(self, questions: List[Dict], candidate_answers: Dict, negative_marking_config: Dict = None, multi_select_scoring_mode: str = 'partial') -> Dict:
+        """Evaluate candidate answers and return detailed results with negative marking support.
 
-        for question in questions:
+        MCQs are scored inline; all subjective answers are then evaluated concurrently in one
+        batched call, so the exam takes roughly one Groq round-trip instead of one per answer.
+        """
+        question_results = [None] * len(questions)
+        subjective = []  # (index in question_results, question, candidate answer)
+        section_neg_configs = resolve_negative_marking_config(negative_marking_config)
+
+        for index, question in enumerate(questions):
             question_id = str(question['id'])
             candidate_answer = candidate_answers.get(question_id, "")
             section_type = question.get('section_type', 'technical')
 
             if question['type'] == 'mcq':
                 # Auto-evaluate MCQ with negative marking
-                result = self._evaluate_mcq(question, candidate_answer, negative_marking_config, section_type, multi_select_scoring_mode)
-                negative_marks += result.get('negative_marks_applied', 0)
+                result = self._evaluate_mcq(question, candidate_answer, negative_marking_config, section_type, multi_select_scoring_mode,
+                                            neg_cfg=section_neg_configs.get(section_type, _NO_NEGATIVE_MARKING))
+                question_results[index] = result
             else:
-                # Use AI to evaluate short/essay answers
-                result = self._evaluate_subjective(question, candidate_answer)
-            
-            total_marks += question['marks']
-            obtained_marks += result['marks_obtained']
-            question_results.append(result)
+                # Use AI to evaluate short/essay answers (below, all at once)
+                subjective.append((index, question, candidate_answer))
+
+        subjective_results = await self._aevaluate_subjective_batch(
+            [(question, candidate_answer) for _, question, candidate_answer in subjective]
+        )
+        for (index, _, _), result in zip(subjective, subjective_results):
+            question_results[index] = result
+
+        # Reduce each marks column once over the finished results
+        total_marks = sum(question['marks'] for question in questions)
+        obtained_marks = sum(result['marks_obtained'] for result in question_results)
+        negative_marks = sum(result.get('negative_marks_applied', 0) for result in question_results)
 
         # Calculate final score considering negative marks
         final_score = obtained_marks - negative_marks
@@ -105,84 +176,130 @@ class ExamSystem:
             'performance_level': get_performance_level(percentage)
         }
 
-    def _evaluate_mcq(self, question: Dict, candidate_answer: str, negative_marking_config: Dict = None, section_type: str = 'technical', multi_select_scoring_mode: str = 'partial') -> Dict:
+    def _evaluate_mcq(self, question: Dict, candidate_answer: str, negative_marking_config: Dict = None, section_type: str = 'technical', multi_select_scoring_mode: str = 'partial', neg_cfg: Optional['SectionNegConfig'] = None) -> Dict:
         """Evaluate MCQ answer with negative marking support.
 
         Delegates to the shared evaluate_mcq_answer function for consistency.
         """
-        return evaluate_mcq_answer(question, candidate_answer, negative_marking_config, section_type, multi_select_scoring_mode)
+        return evaluate_mcq_answer(question, candidate_answer, negative_marking_config, section_type, multi_select_scoring_mode, neg_cfg=neg_cfg)
 
     def _evaluate_subjective(self, question: Dict, candidate_answer: str) -> Dict:
         """Evaluate short/essay answer using AI"""
-        if not candidate_answer.strip():
-            return {
-                'question_id': question['id'],
-                'question_type': question['type'],
-                'question_text': question['question'],
-                'candidate_answer': candidate_answer,
-                'marks_total': question['marks'],
-                'marks_obtained': 0,
-                'negative_marks_applied': 0,
-                'feedback': 'No answer provided.',
-                'evaluation_details': 'Answer was not provided by the candidate.',
-                'ai_evaluated': True,
-                'needs_manual_review': False
-            }
+        return _run_sync(self._aevaluate_subjective_batch([(question, candidate_answer)]))[0]
+
+    async def _aevaluate_subjective_batch(self, answers: List[tuple]) -> List[Dict]:
+        """Evaluate (question, candidate_answer) pairs concurrently, returning results in the same order"""
+        results = [None] * len(answers)
+        items = []
+        item_indices = []
+        cache_keys = []
+        cache_hits = 0
+
+        for index, (question, candidate_answer) in enumerate(answers):
+            if not candidate_answer.strip():
+                results[index] = {
+                    'question_id': question['id'],
+                    'question_type': question['type'],
+                    'question_text': question['question'],
+                    'candidate_answer': candidate_answer,
+                    'marks_total': question['marks'],
+                    'marks_obtained': 0,
+                    'negative_marks_applied': 0,
+                    'feedback': 'No answer provided.',
+                    'evaluation_details': 'Answer was not provided by the candidate.',
+                    'ai_evaluated': True,
+                    'needs_manual_review': False,
+                    'cache_hit': False
+                }
+                continue
+
+            cache_key = _evaluation_cache_key(question, candidate_answer) if self.db is not None else None
+            cached = self.db.get_cached_evaluation(cache_key) if cache_key else None
+            if cached is not None:
+                results[index] = self._subjective_result(question, candidate_answer, cached, cache_hit=True)
+                cache_hits += 1
+            else:
+                items.append({'question': question, 'candidate_answer': candidate_answer})
+                item_indices.append(index)
+                cache_keys.append(cache_key)
 
-        try:
-            evaluation = self.analyzer.evaluate_subjective_answer(question, candidate_answer)
+        if self.db is not None:
+            self.evaluation_cache_lookups += cache_hits + len(items)
+            self.evaluation_cache_hits += cache_hits
+            if cache_hits:
+                hit_rate = self.evaluation_cache_hits / self.evaluation_cache_lookups * 100
+                print(f"♻️ Evaluation cache: {cache_hits} answer(s) reused ({hit_rate:.1f}% hit rate overall)")
 
-            # Check if AI evaluation was successful
-            ai_evaluated = evaluation.get('ai_evaluated', True)
-            needs_manual_review = evaluation.get('needs_manual_review', False)
-
-            return {
-                'question_id': question['id'],
-                'question_type': question['type'],
-                'question_text': question['question'],
-                'candidate_answer': candidate_answer,
-                'marks_total': question['marks'],
-                'marks_obtained': evaluation['marks_awarded'],
-                'negative_marks_applied': 0,  # No negative marking for subjective questions
-                'feedback': evaluation.get('feedback', 'Evaluation completed'),
-                'strengths': evaluation.get('strengths', ''),
-                'improvements': evaluation.get('improvements', ''),
-                'evaluation_details': f"AI Evaluation: {evaluation.get('feedback', '')}",
-                'ai_evaluated': ai_evaluated,
-                'needs_manual_review': needs_manual_review
-            }
+        if not items:
+            return results
 
+        try:
+            evaluations = await self.analyzer.aevaluate_subjective_answers_batch(items)
         except Exception as e:
-            print(f"❌ Error evaluating subjective answer: {str(e)}")
-            # Fallback - 0 marks until manual review (not 50% which is unfair)
-            return {
-                'question_id': question['id'],
-                'question_type': question['type'],
-                'question_text': question['question'],
-                'candidate_answer': candidate_answer,
-                'marks_total': question['marks'],
-                'marks_obtained': 0,  # 0 marks until manual review
-                'negative_marks_applied': 0,
-                'feedback': 'AI evaluation failed. This answer needs manual review by admin.',
-                'evaluation_details': f'Automatic evaluation failed: {str(e)}',
-                'ai_evaluated': False,
-                'needs_manual_review': True
-            }
+            print(f"❌ Error evaluating subjective answers: {str(e)}")
+            evaluations = [e] * len(items)
+
+        for index, item, evaluation, cache_key in zip(item_indices, items, evaluations, cache_keys):
+            question = item['question']
+            candidate_answer = item['candidate_answer']
+
+            if isinstance(evaluation, Exception):
+                # Fallback - 0 marks until manual review (not 50% which is unfair)
+                results[index] = {
+                    'question_id': question['id'],
+                    'question_type': question['type'],
+                    'question_text': question['question'],
+                    'candidate_answer': candidate_answer,
+                    'marks_total': question['marks'],
+                    'marks_obtained': 0,  # 0 marks until manual review
+                    'negative_marks_applied': 0,
+                    'feedback': 'AI evaluation failed. This answer needs manual review by admin.',
+                    'evaluation_details': f'Automatic evaluation failed: {str(evaluation)}',
+                    'ai_evaluated': False,
+                    'needs_manual_review': True,
+                    'cache_hit': False
+                }
+                continue
+
+            # Only cache real, trusted AI evaluations
+            if cache_key and evaluation.get('ai_evaluated', True) and not evaluation.get('needs_manual_review', False):
+                self.db.save_cached_evaluation(cache_key, question['id'], evaluation)
+
+            results[index] = self._subjective_result(question, candidate_answer, evaluation)
+
+        return results
+
+    def _subjective_result(self, question: Dict, candidate_answer: str, evaluation: Dict, cache_hit: bool = False) -> Dict:
+        """Build the per-question result for an AI-evaluated short/essay answer"""
+        return {
+            'question_id': question['id'],
+            'question_type': question['type'],
+            'question_text': question['question'],
+            'candidate_answer': candidate_answer,
+            'marks_total': question['marks'],
+            'marks_obtained': evaluation['marks_awarded'],
+            'negative_marks_applied': 0,  # No negative marking for subjective questions
+            'feedback': evaluation.get('feedback', 'Evaluation completed'),
+            'strengths': evaluation.get('strengths', ''),
+            'improvements': evaluation.get('improvements', ''),
+            'evaluation_details': f"AI Evaluation: {evaluation.get('feedback', '')}",
+            # Check if AI evaluation was successful
+            'ai_evaluated': evaluation.get('ai_evaluated', True),
+            'needs_manual_review': evaluation.get('needs_manual_review', False),
+            'cache_hit': cache_hit
+        }
 
     def _generate_overall_feedback(self, percentage: float, question_results: List[Dict], negative_marks: float = 0) -> str:
         """Generate overall feedback for the candidate including negative marking information"""
-        if percentage >= 85:
-            base_feedback = "Excellent performance! You have demonstrated strong knowledge and understanding."
-        elif percentage >= 70:
-            base_feedback = "Good performance overall. You have shown solid understanding with room for improvement."
-        elif percentage >= 50:
-            base_feedback = "Average performance. You have basic understanding but need to strengthen your knowledge."
-        else:
-            base_feedback = "Below average performance. Significant improvement needed in your preparation."
+        base_feedback = _LEVEL_FEEDBACK[bisect.bisect_right(_LEVEL_THRESHOLDS, percentage)]
 
         # Add specific feedback based on question types
-        mcq_correct = len([r for r in question_results if r['question_type'] == 'mcq' and r.get('is_correct', False)])
-        mcq_total = len([r for r in question_results if r['question_type'] == 'mcq'])
+        mcq_correct = mcq_total = 0
+        for r in question_results:
+            if r['question_type'] == 'mcq':
+                mcq_total += 1
+                if r.get('is_correct', False):
+                    mcq_correct += 1
         
         if mcq_total > 0:
             mcq_percentage = (mcq_correct / mcq_total) * 100
@@ -210,22 +327,24 @@ def verify_admin_session(session_id: str, admin_sessions: Dict, timeout_minutes:
 
     Args:
         session_id: The session ID to verify
-        admin_sessions: Dictionary of admin sessions
+        admin_sessions: Mapping of admin sessions (a plain dict or a cachetools.TTLCache)
         timeout_minutes: Session timeout in minutes
         lock: Optional threading.Lock for thread-safe access
     """
     def _verify():
-        if session_id not in admin_sessions:
+        session = admin_sessions.get(session_id)
+        if session is None:
             return False
 
-        session = admin_sessions[session_id]
-        if datetime.now() > session.expires_at:
+        now = time.monotonic()
+        if now > session.expires_at_monotonic:
             # Session expired, remove it
             del admin_sessions[session_id]
             return False
 
-        # Extend session
-        session.expires_at = datetime.now() + timedelta(minutes=timeout_minutes)
+        # Extend session (re-assigning also restarts a TTLCache entry's time-to-live)
+        session.expires_at_monotonic = now + timeout_minutes * 60
+        admin_sessions[session_id] = session
         return True
 
     if lock:
@@ -240,24 +359,46 @@ def convert_utc_to_bangladesh(utc_time_str: str) -> Optional[str]:
     if not utc_time_str or utc_time_str == 'None':
         return None
     
+    # Malformed values are returned unchanged without going through an exception
+    if not _UTC_TIMESTAMP_RE.fullmatch(utc_time_str):
+        return utc_time_str
+
     try:
-        # Parse the UTC time string
-        utc_time = datetime.strptime(utc_time_str, '%Y-%m-%d %H:%M:%S')
-        # Set it as UTC
-        utc_time = pytz.utc.localize(utc_time)
-        # Convert to Bangladesh time
-        bd_time = utc_time.astimezone(BANGLADESH_TZ)
-        return bd_time.strftime('%Y-%m-%d %H:%M:%S')
-    except Exception as e:
+        # Parse the UTC time string and mark it as UTC
+        utc_time = datetime.fromisoformat(utc_time_str).replace(tzinfo=timezone.utc)
+    except ValueError as e:
+        # Well-formed but out of range (e.g. month 13)
         print(f"Error converting time: {e}")
         return utc_time_str
 
+    # Convert to Bangladesh time
+    bd_time = utc_time.astimezone(BANGLADESH_TZ)
+    return bd_time.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def convert_utc_to_bangladesh_batch(utc_time_strs: List[Optional[str]]) -> List[Optional[str]]:
+    """Convert several UTC time strings to Bangladesh time, converting each distinct value only once"""
+    converted = {}
+    bd_times = []
+    for utc_time_str in utc_time_strs:
+        if utc_time_str not in converted:
+            converted[utc_time_str] = convert_utc_to_bangladesh(utc_time_str)
+        bd_times.append(converted[utc_time_str])
+    return bd_times
+
 
 def order_questions_by_type(questions: List[Dict]) -> List[Dict]:
     """Order questions by type: MCQ first, then Short, then Essay"""
-    mcq_questions = [q for q in questions if q.get('type') == 'mcq']
-    short_questions = [q for q in questions if q.get('type') == 'short']
-    essay_questions = [q for q in questions if q.get('type') == 'essay']
+    mcq_questions = []
+    short_questions = []
+    essay_questions = []
+    buckets = {'mcq': mcq_questions, 'short': short_questions, 'essay': essay_questions}
+
+    # Single pass; questions of any other type are left out, as before
+    for q in questions:
+        bucket = buckets.get(q.get('type'))
+        if bucket is not None:
+            bucket.append(q)
     
     # Combine in order: MCQ → Short → Essay
     ordered_questions = mcq_questions + short_questions + essay_questions
@@ -268,31 +409,63 @@ def order_questions_by_type(questions: List[Dict]) -> List[Dict]:
 
 def group_questions_by_section_for_navigation(questions: List[Dict]) -> Dict[str, List[Dict]]:
     """Group questions by section type for navigation purposes"""
-    sections = {}
+    sections = defaultdict(list)
     for question in questions:
-        section_type = question.get('section_type', 'technical')
-        if section_type not in sections:
-            sections[section_type] = []
-        sections[section_type].append(question)
-    return sections
+        sections[question.get('section_type', 'technical')].append(question)
+    return dict(sections)
 
 
 def get_performance_level(percentage: float) -> str:
     """Get performance level based on percentage"""
-    if percentage >= 85:
-        return "Excellent"
-    elif percentage >= 70:
-        return "Good"
-    elif percentage >= 50:
-        return "Average"
-    else:
-        return "Poor"
+    return _LEVELS[bisect.bisect_right(_LEVEL_THRESHOLDS, percentage)]
+
+
+class SectionNegConfig(NamedTuple):
+    """Negative marking settings of one section, resolved from the exam's negative_marking_config"""
+    enabled: bool = False
+    mcq_negative_marks: float = 0
+    apply_to_unanswered: bool = False
+
+    @classmethod
+    def from_dict(cls, section_config: Optional[Dict]) -> 'SectionNegConfig':
+        if not section_config:
+            return _NO_NEGATIVE_MARKING
+        return cls(
+            enabled=section_config.get('enabled', False),
+            mcq_negative_marks=section_config.get('mcq_negative_marks', 0),
+            apply_to_unanswered=section_config.get('apply_to_unanswered', False)
+        )
+
+
+_NO_NEGATIVE_MARKING = SectionNegConfig()
+
+
+def resolve_negative_marking_config(negative_marking_config: Optional[Dict]) -> Dict[str, SectionNegConfig]:
+    """Resolve an exam's negative_marking_config once, before evaluating its questions"""
+    return {
+        section_type: SectionNegConfig.from_dict(section_config)
+        for section_type, section_config in (negative_marking_config or {}).items()
+    }
+
+
+# "A) ", "B) ", ... prefixes used when echoing selected/correct options back in results
+_OPTION_PREFIXES = tuple(f"{chr(65 + i)}) " for i in range(26))
+
+
+def _parse_option_index(value) -> Optional[int]:
+    """Option index of a candidate answer value (an int or a digit string), or None"""
+    if type(value) is int:
+        return value if value >= 0 else None
+    if isinstance(value, str) and value.isdigit():
+        return int(value)
+    return None
 
 
 def evaluate_mcq_answer(question: Dict, candidate_answer,
                         negative_marking_config: Dict = None,
                         section_type: str = 'technical',
-                        multi_select_scoring_mode: str = 'partial') -> Dict:
+                        multi_select_scoring_mode: str = 'partial',
+                        neg_cfg: Optional[SectionNegConfig] = None) -> Dict:
     """
     Evaluate a single MCQ answer with negative marking support.
     Supports both single-select and multi-select MCQs.
@@ -308,6 +481,8 @@ def evaluate_mcq_answer(question: Dict, candidate_answer,
         negative_marking_config: Dict with section configs for negative marking
         section_type: The section type (technical, english, etc.) for negative marking lookup
         multi_select_scoring_mode: 'partial' for partial scoring, 'strict' for exact match only
+        neg_cfg: Pre-resolved negative marking settings for the section (see
+                 resolve_negative_marking_config); takes precedence over negative_marking_config
 
     Returns:
         Dict with evaluation results
@@ -317,14 +492,17 @@ def evaluate_mcq_answer(question: Dict, candidate_answer,
     negative_marks_applied = 0
     is_multi_select = question.get('is_multi_select', False)
 
+    if neg_cfg is None:
+        neg_cfg = SectionNegConfig.from_dict((negative_marking_config or {}).get(section_type))
+    neg_enabled, neg_marks, neg_unanswered = neg_cfg
+
     if is_multi_select:
         # Multi-select MCQ evaluation
         correct_answers = question.get('correct_answers', [])
         if isinstance(correct_answers, str):
-            import json
             try:
-                correct_answers = json.loads(correct_answers)
-            except:
+                correct_answers = orjson.loads(correct_answers)
+            except (ValueError, TypeError):
                 correct_answers = []
 
         # Parse candidate answers
@@ -332,7 +510,7 @@ def evaluate_mcq_answer(question: Dict, candidate_answer,
         if candidate_answer:
             if isinstance(candidate_answer, list):
                 # Already a list
-                candidate_selections = set(int(a) for a in candidate_answer if str(a).isdigit())
+                candidate_selections = {idx for idx in map(_parse_option_index, candidate_answer) if idx is not None}
             elif isinstance(candidate_answer, str):
                 # Could be comma-separated or single value
                 if ',' in candidate_answer:
@@ -356,10 +534,8 @@ def evaluate_mcq_answer(question: Dict, candidate_answer,
                     # Strict mode: 0 marks for any deviation from exact answer
                     marks_obtained = 0
                     # Apply negative marking if there are wrong selections
-                    if incorrect_selected > 0 and negative_marking_config and section_type in negative_marking_config:
-                        section_config = negative_marking_config[section_type]
-                        if section_config.get('enabled', False):
-                            negative_marks_applied = section_config.get('mcq_negative_marks', 0) * incorrect_selected
+                    if incorrect_selected > 0 and neg_enabled:
+                        negative_marks_applied = neg_marks * incorrect_selected
                 else:
                     # Partial scoring mode (default)
                     # Formula: (correct_selected - incorrect_selected) / total_correct * marks
@@ -370,17 +546,13 @@ def evaluate_mcq_answer(question: Dict, candidate_answer,
                         marks_obtained = round(marks_obtained, 2)
 
                     # Apply negative marking for wrong selections
-                    if incorrect_selected > 0 and negative_marking_config and section_type in negative_marking_config:
-                        section_config = negative_marking_config[section_type]
-                        if section_config.get('enabled', False):
-                            # Negative marking per incorrect selection
-                            negative_marks_applied = section_config.get('mcq_negative_marks', 0) * incorrect_selected
+                    if incorrect_selected > 0 and neg_enabled:
+                        # Negative marking per incorrect selection
+                        negative_marks_applied = neg_marks * incorrect_selected
         else:
             # No answer provided
-            if negative_marking_config and section_type in negative_marking_config:
-                section_config = negative_marking_config[section_type]
-                if section_config.get('enabled', False) and section_config.get('apply_to_unanswered', False):
-                    negative_marks_applied = section_config.get('mcq_negative_marks', 0)
+            if neg_enabled and neg_unanswered:
+                negative_marks_applied = neg_marks
 
         # Get selected options text safely
         selected_option_text = 'No answer'
@@ -389,7 +561,7 @@ def evaluate_mcq_answer(question: Dict, candidate_answer,
             selected_texts = []
             for idx in sorted(candidate_selections):
                 if 0 <= idx < len(options):
-                    selected_texts.append(f"{chr(65 + idx)}) {options[idx]}")
+                    selected_texts.append(_OPTION_PREFIXES[idx] + options[idx])
             selected_option_text = '; '.join(selected_texts) if selected_texts else 'No answer'
 
         # Get correct answers text
@@ -397,7 +569,7 @@ def evaluate_mcq_answer(question: Dict, candidate_answer,
         options = question.get('options', [])
         for idx in correct_answers:
             if 0 <= idx < len(options):
-                correct_answers_text.append(f"{chr(65 + idx)}) {options[idx]}")
+                correct_answers_text.append(_OPTION_PREFIXES[idx] + options[idx])
 
         return {
             'question_id': question['id'],
@@ -417,31 +589,26 @@ def evaluate_mcq_answer(question: Dict, candidate_answer,
 
     else:
         # Single-select MCQ evaluation (original logic)
-        if candidate_answer and str(candidate_answer).isdigit():
-            selected_option = int(candidate_answer)
+        selected_option = _parse_option_index(candidate_answer)
+        if selected_option is not None:
             is_correct = selected_option == question['correct_answer']
             if is_correct:
                 marks_obtained = question['marks']
             else:
                 # Apply negative marking if configured
-                if negative_marking_config and section_type in negative_marking_config:
-                    section_config = negative_marking_config[section_type]
-                    if section_config.get('enabled', False):
-                        negative_marks_applied = section_config.get('mcq_negative_marks', 0)
+                if neg_enabled:
+                    negative_marks_applied = neg_marks
         else:
             # No answer provided - check if negative marking applies to unanswered questions
-            if negative_marking_config and section_type in negative_marking_config:
-                section_config = negative_marking_config[section_type]
-                if section_config.get('enabled', False) and section_config.get('apply_to_unanswered', False):
-                    negative_marks_applied = section_config.get('mcq_negative_marks', 0)
+            if neg_enabled and neg_unanswered:
+                negative_marks_applied = neg_marks
 
         # Get selected option text safely
         selected_option_text = 'No answer'
-        if candidate_answer and str(candidate_answer).isdigit():
-            idx = int(candidate_answer)
+        if selected_option is not None:
             options = question.get('options', [])
-            if 0 <= idx < len(options):
-                selected_option_text = options[idx]
+            if selected_option < len(options):
+                selected_option_text = options[selected_option]
 
         return {
             'question_id': question['id'],
@@ -477,9 +644,25 @@ def validate_form_data(form_data: Dict) -> tuple[bool, str]:
     return True, ""
 
 
+class _SafeFilenameTable(dict):
+    """str.translate table that keeps alphanumerics, space, '-' and '_' and drops everything else.
+
+    Entries are filled in lazily, so each code point is classified once per process.
+    """
+
+    def __missing__(self, codepoint: int):
+        char = chr(codepoint)
+        value = codepoint if char.isalnum() or char in ' -_' else None
+        self[codepoint] = value
+        return value
+
+
+_SAFE_FILENAME_TABLE = _SafeFilenameTable()
+
+
 def generate_safe_filename(candidate_name: str, result_id: str, extension: str = 'html') -> str:
     """Generate a safe filename for downloads"""
-    safe_name = "".join(c for c in candidate_name if c.isalnum() or c in (' ', '-', '_')).rstrip()
+    safe_name = candidate_name.translate(_SAFE_FILENAME_TABLE).rstrip()
     return f"exam_result_{safe_name}_{result_id[:8]}.{extension}"
 
 
@@ -495,12 +678,22 @@ def calculate_exam_statistics(results: List[Dict]) -> Dict:
         }
     
     total_candidates = len(results)
-    percentages = [result['percentage'] for result in results]
-    
-    average_percentage = sum(percentages) / total_candidates
-    highest_score = max(percentages)
-    lowest_score = min(percentages)
-    pass_count = len([p for p in percentages if p >= 50])  # Assuming 50% is pass mark
+
+    # One pass over the results instead of a list copy plus four scans
+    total_percentage = 0
+    highest_score = lowest_score = results[0]['percentage']
+    pass_count = 0
+    for result in results:
+        percentage = result['percentage']
+        total_percentage += percentage
+        if percentage > highest_score:
+            highest_score = percentage
+        elif percentage < lowest_score:
+            lowest_score = percentage
+        if percentage >= 50:  # Assuming 50% is pass mark
+            pass_count += 1
+
+    average_percentage = total_percentage / total_candidates
     pass_rate = (pass_count / total_candidates) * 100
     
     return {
@@ -526,16 +719,21 @@ def format_time_duration(minutes: int) -> str:
         return f"{hours} hour{'s' if hours != 1 else ''} {remaining_minutes} minutes"
 
 
+# Characters escaped by sanitize_json_string, applied in a single str.translate pass
+_JSON_ESCAPE_TABLE = str.maketrans({
+    '\\': '\\\\',
+    '"': '\\"',
+    '\n': '\\n',
+    '\r': '\\r',
+    '\t': '\\t',
+})
+
+
 def sanitize_json_string(text: str) -> str:
     """Sanitize string for JSON serialization"""
     if not text:
         return ""
-    
-    # Replace problematic characters
-    text = text.replace('\n', '\\n')
-    text = text.replace('\r', '\\r')
-    text = text.replace('\t', '\\t')
-    text = text.replace('"', '\\"')
-    text = text.replace('\\', '\\\\')
-    
-    return text
\ No newline at end of file
+
+    # One pass; unlike chained replace() calls, the backslashes added for the
+    # other characters are not escaped a second time
+    return text.translate(_JSON_ESCAPE_TABLE)
\ No newline at end of file